@@ -0,0 +1,91 @@
+"""Measure resetting and erasing a user with many rows.
+
+Seeds a throwaway user with --rows rows in every tracker table (plus a debt,
+the enough calculator, an assessment and the calculator snapshot), then times accounts.reset and
+accounts.erase, counting the statements each sends and checking that each
+leaves nothing behind in the tables it clears. Every run is rolled back, so it is safe against
+the app's configured database.
+
+    python benchmarks/account_reset.py
+    python benchmarks/account_reset.py --rows 20000 --repeat 3
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from summary_queries import count_statements
+from tracker_load import seed
+
+
+def _rows_left(user_id, tables):
+    from primetime_toolkit.models import db
+
+    return {table.name: n for table in tables
+            if (n := db.session.execute(db.select(db.func.count()).select_from(table)
+                                        .where(table.c.user_id == user_id)).scalar())}
+
+
+def run(operation, tables, rows, repeat):
+    """(statements, mean seconds, rows left in tables) for operation(user_id) on a freshly seeded user."""
+    from primetime_toolkit import calculator_summary
+    from primetime_toolkit.models import db, User, Assessment, DebtPaydown, EnoughCalculator
+
+    statements, elapsed, left = 0, 0.0, {}
+    for _ in range(repeat):
+        user = User('reset-bench', 'reset-bench@example.invalid', '')
+        db.session.add(user)
+        db.session.flush()
+        seed(user.id, rows)
+        db.session.add_all([Assessment(user_id=user.id, total_score=50),
+                            DebtPaydown(user_id=user.id, name='Card', principal=1000),
+                            EnoughCalculator(user_id=user.id, years=25)])
+        calculator_summary.refresh(user.id)
+        db.session.flush()
+
+        with count_statements(db.engine) as sent:
+            start = time.perf_counter()
+            operation(user.id)
+            db.session.flush()
+            elapsed += time.perf_counter() - start
+        statements = len(sent)
+        left = _rows_left(user.id, tables)
+        db.session.rollback()
+    return statements, elapsed / max(repeat, 1), left
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=5000, help='rows per tracker table')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per operation')
+    args = parser.parse_args(argv)
+
+    from primetime_toolkit import create_app, accounts
+    from primetime_toolkit.models import db
+
+    app = create_app()
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        operations = (
+            ('reset', accounts.reset, accounts.tracker_tables()),
+            ('erase', accounts.erase, accounts.user_tables()),
+        )
+        results = {name: run(operation, tables, args.rows, args.repeat) for name, operation, tables in operations}
+        dialect = db.engine.dialect.name
+
+    print(f"{args.rows} rows per tracker table ({dialect})")
+    for name, (statements, seconds, _) in results.items():
+        print(f"  {name:<6} {statements:>2} statement(s)  {seconds * 1000:9.2f} ms")
+
+    failed = {name: left for name, (_, _, left) in results.items() if left}
+    for name, left in failed.items():
+        print(f"FAIL: {name} left rows in {', '.join(sorted(left))}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Hammer the save endpoints from several threads and count lock errors.
+
+Creates a throwaway SQLite database in a temporary directory, one user per
+thread, and has every thread post --saves changed tables to the save_*
+endpoints as fast as it can. Exits non-zero if any save failed, e.g. with
+"database is locked". The engine settings come from the environment exactly
+as in production; the flags override them for this run (the last line below
+reproduces the old rollback-journal, no-wait behaviour).
+
+    python benchmarks/concurrent_saves.py
+    python benchmarks/concurrent_saves.py --threads 16 --saves 50
+    python benchmarks/concurrent_saves.py --journal-mode DELETE --busy-timeout 0
+"""
+import os
+import io
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'concurrent-saves'
+
+
+def payload(endpoint, rnd, rows):
+    """JSON body for one save to endpoint, with fresh amounts so every save writes."""
+    def amount():
+        return round(rnd.uniform(1, 5000), 2)
+
+    make = {
+        '/save-assets': ('assets', lambda i: dict(category='Cash', description=f'a{i}', amount=amount(),
+                                                  owner='Me', include=True)),
+        '/save-liabilities': ('liabilities', lambda i: dict(category='Loan', name=f'l{i}', amount=amount(),
+                                                            type='Personal', monthly=0, notes='')),
+        '/save-income': ('incomes', lambda i: dict(source=f'Job {i}', amount=amount(), frequency='Monthly',
+                                                   notes='', include=True)),
+        '/save-expenses': ('expenses', lambda i: dict(category='Food', item=f'e{i}', amount=amount(),
+                                                      frequency='Weekly', type='Essential')),
+        '/save-subscriptions': ('subscriptions', lambda i: dict(name=f's{i}', provider='', amount=amount(),
+                                                                frequency='monthly', include=True)),
+    }
+    key, row = make[endpoint]
+    return {key: [row(i) for i in range(rows)]}
+
+
+ENDPOINTS = ['/save-assets', '/save-liabilities', '/save-income', '/save-expenses', '/save-subscriptions']
+
+
+def worker(app, email, saves, rows, start, results):
+    rnd = random.Random(email)
+    client = app.test_client()
+    client.post('/auth/login', data={'email': email, 'password': PASSWORD})
+    start.wait()
+    for n in range(saves):
+        endpoint = ENDPOINTS[n % len(ENDPOINTS)]
+        began = time.perf_counter()
+        try:
+            response = client.post(endpoint, json=payload(endpoint, rnd, rows))
+            error = None
+            if response.status_code != 200:
+                error = f'{response.status_code} {response.get_data(as_text=True)[:200]}'
+        except Exception as e:              # raised by the save endpoints without a try/except
+            error = f'{type(e).__name__}: {str(e).splitlines()[0]}'
+        results.append((endpoint, time.perf_counter() - began, error))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--saves', type=int, default=25, help='saves per thread')
+    parser.add_argument('--rows', type=int, default=20, help='rows per saved table')
+    parser.add_argument('--journal-mode', help='overrides SQLITE_JOURNAL_MODE')
+    parser.add_argument('--busy-timeout', type=int, help='overrides SQLITE_BUSY_TIMEOUT_MS')
+    args = parser.parse_args(argv)
+
+    folder = tempfile.mkdtemp(prefix='concurrent-saves-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(folder, 'concurrent.db')
+    if args.journal_mode:
+        os.environ['SQLITE_JOURNAL_MODE'] = args.journal_mode
+    if args.busy_timeout is not None:
+        os.environ['SQLITE_BUSY_TIMEOUT_MS'] = str(args.busy_timeout)
+
+    from werkzeug.security import generate_password_hash
+    from primetime_toolkit import create_app
+    from primetime_toolkit.extension import limiter
+    from primetime_toolkit.models import db, User
+
+    try:
+        app = create_app()
+        app.config.update(SESSION_COOKIE_SECURE=False, PROPAGATE_EXCEPTIONS=True,
+                          UPLOAD_FOLDER=os.path.join(folder, 'uploads'))
+        limiter.enabled = False             # the per-user save limits would throttle the run, not the database
+        emails = [f'saver{i}@example.invalid' for i in range(args.threads)]
+        with app.app_context():
+            db.create_all()
+            pword = generate_password_hash(PASSWORD)
+            db.session.add_all(User(email.split('@')[0], email, pword) for email in emails)
+            db.session.commit()
+
+        results, start = [], threading.Barrier(args.threads)
+        threads = [threading.Thread(target=worker, args=(app, email, args.saves, args.rows, start, results))
+                   for email in emails]
+        began = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - began
+
+        with app.app_context():
+            pragmas = {name: db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+                       for name in ('journal_mode', 'busy_timeout', 'synchronous')}
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    errors = [(endpoint, error) for endpoint, _, error in results if error]
+    latencies = sorted(seconds for _, seconds, _ in results)
+    print(f"{args.threads} threads x {args.saves} saves of {args.rows} rows  "
+          f"({', '.join(f'{k}={v}' for k, v in pragmas.items())})")
+    print(f"  {len(results)} saves in {elapsed:.2f} s, {len(results) / elapsed:.1f} per second; "
+          f"median {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    if errors:
+        print(f"FAIL: {len(errors)} save(s) failed, first: {errors[0][0]} {errors[0][1]}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
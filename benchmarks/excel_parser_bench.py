@@ -0,0 +1,227 @@
+"""Benchmark excel_parser.parse_excel against synthetic toolkit workbooks.
+
+Workbooks are generated from the bundled template
+(static/files/Prime_Time_Big_Financial_Picture_T362_QUT.xlsx), so the harness
+runs offline. Each case varies:
+
+  * rows     - line items written under every item sheet's header
+  * offset   - blank rows inserted above the header (exercises header detection)
+  * naming   - sheet naming variant matched by find_sheet
+
+and every parse runs in a fresh process so peak RSS is per workbook.
+
+    python benchmarks/excel_parser_bench.py
+    python benchmarks/excel_parser_bench.py --rows 100,50000 --offsets 0 --naming template --streaming both
+"""
+import os
+import sys
+import io
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEMPLATE = os.path.join(ROOT, 'primetime_toolkit', 'static', 'files',
+                        'Prime_Time_Big_Financial_Picture_T362_QUT.xlsx')
+
+# Template sheet -> section, and the names each naming variant gives it.
+# Every variant must still be matched by SHEET_KEYWORDS in excel_parser.
+SHEETS = {
+    '3. Assets':                 'assets',
+    '4. Liabilities & Savings':  'liabilities',
+    '5. Current Income':         'income',
+    '6. Current Expenses':       'expenses',
+    '7. Subscriptions':          'subscriptions',
+    '9. Epic & One-off':         'epic',
+}
+NAMINGS = {
+    'template': {},
+    'plain': {
+        '3. Assets': 'Assets', '4. Liabilities & Savings': 'Liabilities',
+        '5. Current Income': 'Income', '6. Current Expenses': 'Expenses',
+        '7. Subscriptions': 'Subscriptions', '9. Epic & One-off': 'Epic',
+        '12. Summary': 'Summary', '13. Super Projection': 'Super',
+    },
+    'variant': {
+        '3. Assets': 'ASSET REGISTER', '4. Liabilities & Savings': 'Debts and loans',
+        '5. Current Income': 'Salary & earnings', '6. Current Expenses': 'Spending',
+        '7. Subscriptions': 'Services', '9. Epic & One-off': 'One-off costs',
+        '12. Summary': 'Overview', '13. Super Projection': 'Superannuation',
+    },
+}
+FREQUENCIES = ['Weekly', 'Fortnightly', 'Monthly', 'Quarterly', 'Annually']
+EPIC_FREQUENCIES = ['Once only', 'Every year', 'Every second year']
+
+
+# ---------- Workbook generator ----------
+
+def _header_row(ws):
+    """1-based row of the template table header (first row with 3+ text cells)."""
+    for row in ws.iter_rows(min_row=1, max_row=10):
+        if sum(isinstance(c.value, str) for c in row) >= 3:
+            return row[0].row
+    raise ValueError(f"No header found on {ws.title}")
+
+
+def _fill_items(ws, section, rows, rng):
+    header = _header_row(ws)
+    headers = [str(c.value or '').lower() for c in ws[header]]
+    samples = [
+        [c.value for c in r] for r in ws.iter_rows(min_row=header + 1, max_row=ws.max_row)
+        if r[0].value not in (None, '') and not str(r[0].value).lower().startswith('total')
+    ] or [[f'{section} item'] + [None] * (len(headers) - 1)]
+
+    ws.delete_rows(header + 1, ws.max_row)
+    for i in range(rows):
+        values = list(samples[i % len(samples)])
+        for j, h in enumerate(headers):
+            if 'freq' in h:
+                values[j] = rng.choice(EPIC_FREQUENCIES if section == 'epic' else FREQUENCIES)
+            elif '$' in h or 'amount' in h or 'value' in h or 'balance' in h or 'cost' in h:
+                values[j] = round(rng.uniform(0, 5000), 2)
+        ws.append(values)
+
+
+def make_workbook(path, rows=20, offset=0, naming='template', seed=0):
+    """Write a toolkit-shaped workbook to path and return it."""
+    import openpyxl
+
+    rng = random.Random(seed)
+    wb = openpyxl.load_workbook(TEMPLATE, data_only=True)    # keep cached values, drop formulas
+    for title, section in SHEETS.items():
+        ws = wb[title]
+        _fill_items(ws, section, rows, rng)
+        if offset:
+            ws.insert_rows(1, offset)
+    for old, new in NAMINGS[naming].items():
+        wb[old].title = new
+    wb.save(path)
+    return path
+
+
+# ---------- Measurement (runs in a fresh process) ----------
+
+def _status_mb(field):
+    """VmRSS / VmHWM from /proc (Linux), falling back to ru_maxrss elsewhere."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss survives fork/exec on Linux and is bytes on macOS; only a rough fallback.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')                     # resets VmHWM to the current RSS
+    except OSError:
+        pass
+
+
+def _measure(path, streaming):
+    import pandas as pd
+    from primetime_toolkit import excel_parser
+
+    counts = {'read_excel': 0, 'header_attempts': 0}
+
+    read_excel, parse = pd.read_excel, pd.ExcelFile.parse
+    frame_with_header, header_rows = excel_parser.frame_with_header, excel_parser.header_rows
+
+    def counting_read_excel(*args, **kwargs):
+        counts['read_excel'] += 1
+        return read_excel(*args, **kwargs)
+
+    def counting_parse(self, sheet_name=0, *args, **kwargs):
+        counts['read_excel'] += len(sheet_name) if isinstance(sheet_name, list) else 1
+        return parse(self, sheet_name, *args, **kwargs)
+
+    def counting_frame_with_header(raw, header_row):
+        counts['header_attempts'] += 1
+        return frame_with_header(raw, header_row)
+
+    def counting_header_rows(raw):
+        counts['header_attempts'] += 1
+        return header_rows(raw)
+
+    pd.read_excel = counting_read_excel
+    pd.ExcelFile.parse = counting_parse
+    excel_parser.frame_with_header = counting_frame_with_header
+    excel_parser.header_rows = counting_header_rows
+
+    baseline = _status_mb('VmRSS')
+    _reset_peak()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = excel_parser.parse_excel(path, streaming=streaming)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'seconds': elapsed,
+        'peak_rss_mb': _status_mb('VmHWM'),
+        'parse_rss_mb': _status_mb('VmHWM') - baseline,
+        'items': sum(len(data[k]['items']) for k in ('assets', 'liabilities', 'income', 'expenses', 'epic')),
+        **counts,
+    }
+
+
+def run_case(path, streaming):
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(_measure, (path, streaming))
+
+
+# ---------- CLI ----------
+
+def _ints(text):
+    return [int(x) for x in text.split(',') if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=_ints, default=[20, 1000, 20000])
+    parser.add_argument('--offsets', type=_ints, default=[0, 2])
+    parser.add_argument('--naming', default='all', help="comma list of %s, or 'all'" % ','.join(NAMINGS))
+    parser.add_argument('--streaming', choices=['auto', 'off', 'on', 'both'], default='auto')
+    parser.add_argument('--repeat', type=int, default=1, help='parses per case; the fastest is reported')
+    parser.add_argument('--keep', metavar='DIR', help='write generated workbooks here instead of a temp dir')
+    args = parser.parse_args(argv)
+
+    namings = list(NAMINGS) if args.naming == 'all' else args.naming.split(',')
+    modes = {'auto': [None], 'off': [False], 'on': [True], 'both': [False, True]}[args.streaming]
+    folder = args.keep or tempfile.mkdtemp(prefix='excel_bench_')
+    os.makedirs(folder, exist_ok=True)
+
+    print(f"{'rows':>7} {'offset':>6} {'naming':>9} {'stream':>6} {'size KB':>8} {'items':>7} "
+          f"{'seconds':>8} {'peak MB':>8} {'parse MB':>8} {'reads':>5} {'headers':>7}")
+    for rows in args.rows:
+        for offset in args.offsets:
+            for naming in namings:
+                path = os.path.join(folder, f"bench_{rows}_{offset}_{naming}.xlsx")
+                if not os.path.exists(path):
+                    make_workbook(path, rows=rows, offset=offset, naming=naming)
+                size_kb = os.path.getsize(path) / 1024
+                for streaming in modes:
+                    best = min((run_case(path, streaming) for _ in range(args.repeat)),
+                               key=lambda r: r['seconds'])
+                    mode = {None: 'auto', False: 'off', True: 'on'}[streaming]
+                    print(f"{rows:>7} {offset:>6} {naming:>9} {mode:>6} {size_kb:>8.0f} {best['items']:>7} "
+                          f"{best['seconds']:>8.3f} {best['peak_rss_mb']:>8.1f} {best['parse_rss_mb']:>8.1f} "
+                          f"{best['read_excel']:>5} {best['header_attempts']:>7}")
+
+    if not args.keep:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Check that malformed calculator payloads are refused with 400 and write nothing.
+
+Creates a throwaway SQLite database in a temporary directory and posts
+payloads with non-numeric amounts, missing keys or a bad epic_years to the
+save endpoints, the batch endpoint and the row PATCH. Each must answer 400
+and leave the user's data_version unchanged. A well-formed save to every
+endpoint must still succeed. Exits non-zero if any check failed.
+
+    python benchmarks/malformed_saves.py
+"""
+import os
+import io
+import sys
+import shutil
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'malformed-saves'
+
+ASSET = dict(category='Cash', description='Bank', amount=100, owner='Me', include=True)
+
+# (method, url, body) that must be refused
+MALFORMED = [
+    ('POST', '/save-assets', {'assets': [dict(ASSET, amount='lots')]}),
+    ('POST', '/save-assets', {'assets': [{'category': 'Cash'}]}),
+    ('POST', '/save-liabilities', {'liabilities': [dict(category='Loan', name='Car', amount=1, type='',
+                                                        monthly='n/a', notes='')]}),
+    ('POST', '/save-income', {'incomes': [dict(source='Job', amount='1,000', frequency='Monthly')]}),
+    ('POST', '/save-expenses', {'expenses': [dict(category='Food', amount='abc', frequency='Weekly')]}),
+    ('POST', '/save-subscriptions', {'subscriptions': [dict(name='Gym', amount=[20], frequency='monthly')]}),
+    ('POST', '/save-future-budget', {'budgets': [dict(phase='Now', baseline_cost='x')]}),
+    ('POST', '/save-epic', {'items': [dict(item='Trip', amount='far', frequency='Once only')]}),
+    ('POST', '/save-epic', {'items': [], 'settings': {'years': 'ten'}}),
+    ('POST', '/save-epic', {'items': [], 'settings': {'years': 0}}),
+    ('POST', '/save-income_layers', {'items': [dict(layer='Super', start_age='sixty', annual_amount=1)]}),
+    ('POST', '/save-spending', {'allocations': [dict(phase='Now', cost_base='NaN')]}),
+    ('POST', '/save-debt_paydown', {'debts': [dict(name='Card', principal='some')]}),
+    ('POST', '/save-enough_calculator', {'real_rate': 'high'}),
+    ('POST', '/save-lifeexpectancy', {'gender': 'female', 'percentile': '50th', 'current_age': 'old',
+                                      'expected_lifespan': 88, 'years_remaining': 38,
+                                      'estimated_year_of_death': 2064}),
+    ('POST', '/save-calculators', {'assets': [ASSET], 'income': [dict(amount='x')]}),
+    ('POST', '/save-calculators', {'assets': [ASSET], 'epic_years': -1}),
+    ('PATCH', '/calculators/assets/rows', {'upsert': [dict(ASSET, amount='lots')]}),
+]
+
+# (url, body) that must still save
+WELL_FORMED = [
+    ('/save-assets', {'assets': [dict(ASSET, amount='100.5')]}),
+    ('/save-liabilities', {'liabilities': [dict(category='Loan', name='Car', amount=1, type='', monthly='',
+                                                notes='')]}),
+    ('/save-income', {'incomes': [dict(source='Job', amount=1000, frequency='Monthly')]}),
+    ('/save-expenses', {'expenses': [dict(category='Food', amount='', frequency='Weekly')]}),
+    ('/save-subscriptions', {'subscriptions': [dict(name='Gym', amount=20, frequency='monthly')]}),
+    ('/save-future-budget', {'budgets': [dict(phase='Now', baseline_cost=30000)]}),
+    ('/save-epic', {'items': [dict(item='Trip', amount=9000, frequency='Once only')], 'settings': {'years': '12'}}),
+    ('/save-income_layers', {'items': [dict(layer='Super', start_age=60, end_age=None, annual_amount=1)]}),
+    ('/save-spending', {'allocations': [dict(phase='Now', cost_base=1)]}),
+    ('/save-debt_paydown', {'debts': [dict(name='Card', principal=1000, monthly_payment=50)]}),
+    ('/save-enough_calculator', {'real_rate': 3.5, 'years': 25}),
+    ('/save-calculators', {'assets': [ASSET], 'epic_years': 10}),
+]
+
+
+def main(argv=None):
+    folder = tempfile.mkdtemp(prefix='malformed-saves-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(folder, 'malformed.db')
+
+    from werkzeug.security import generate_password_hash
+    from primetime_toolkit import create_app, data_version
+    from primetime_toolkit.extension import limiter
+    from primetime_toolkit.models import db, User
+
+    failures = []
+    try:
+        app = create_app()
+        app.config.update(SESSION_COOKIE_SECURE=False, PROPAGATE_EXCEPTIONS=True)
+        limiter.enabled = False
+        with app.app_context():
+            db.create_all()
+            user = User('malformed', 'malformed@example.invalid', generate_password_hash(PASSWORD))
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        def version():
+            with app.app_context():
+                return data_version.get(user_id)
+
+        client = app.test_client()
+        client.post('/auth/login', data={'email': 'malformed@example.invalid', 'password': PASSWORD})
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            for method, url, body in MALFORMED:
+                before = version()
+                response = client.open(url, method=method, json=body, headers={'If-Match': f'"{user_id}-{before}"'})
+                if response.status_code != 400 or version() != before:
+                    failures.append(f"{method} {url} {body}: {response.status_code}, "
+                                    f"data_version {before} -> {version()}")
+            for url, body in WELL_FORMED:
+                response = client.post(url, json=body)
+                if response.status_code != 200 or 'error' in (response.get_json(silent=True) or {}):
+                    failures.append(f"POST {url} {body}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    print(f"{len(MALFORMED)} malformed payload(s) refused, {len(WELL_FORMED)} well-formed save(s) checked, "
+          f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
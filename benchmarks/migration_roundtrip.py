@@ -0,0 +1,110 @@
+"""Check that migrating down to the base revision and back up keeps every user's rows.
+
+Creates a throwaway SQLite database in a temporary directory at the head
+revision, seeds a user with --rows rows in every per-user table, then runs
+each downgrade down to the base and each upgrade back to the head, counting
+the user's rows after every step. A table a downgrade drops is skipped from
+then on; every other table must keep all of its rows. SQLite batch
+migrations copy, drop and rename tables, so with foreign keys on, dropping
+the old user table would cascade-delete everything that references it.
+Exits non-zero if any step lost rows or left foreign keys switched off.
+
+    python benchmarks/migration_roundtrip.py
+"""
+import os
+import io
+import sys
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tracker_load import seed
+
+MIGRATIONS = os.path.join(ROOT, 'migrations')
+
+
+def _counts(user_id):
+    """{table: rows of user_id} for every per-user table the database currently has."""
+    from sqlalchemy import inspect
+    from primetime_toolkit import accounts
+    from primetime_toolkit.models import db
+
+    existing = set(inspect(db.engine).get_table_names())
+    return {table.name: db.session.execute(db.select(db.func.count()).select_from(table)
+                                           .where(table.c.user_id == user_id)).scalar()
+            for table in accounts.user_tables() if table.name in existing}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=20, help='rows per tracker table')
+    args = parser.parse_args(argv)
+
+    folder = tempfile.mkdtemp(prefix='migration-roundtrip-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(folder, 'roundtrip.db')
+
+    from alembic.script import ScriptDirectory
+    from flask_migrate import downgrade, stamp, upgrade
+    from primetime_toolkit import create_app, calculator_summary
+    from primetime_toolkit.models import db, User, Assessment, DebtPaydown, EnoughCalculator
+
+    revisions = [(script.revision, script.down_revision or 'base')
+                 for script in ScriptDirectory(MIGRATIONS).walk_revisions()]
+    failures, dropped, expected = [], set(), {}
+    try:
+        app = create_app()
+        with app.app_context(), contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            db.create_all()
+            stamp(directory=MIGRATIONS)
+            user = User('roundtrip', 'roundtrip@example.invalid', '')
+            db.session.add(user)
+            db.session.flush()
+            seed(user.id, args.rows)
+            db.session.add_all([Assessment(user_id=user.id, total_score=50),
+                                DebtPaydown(user_id=user.id, name='Card', principal=1000),
+                                EnoughCalculator(user_id=user.id, years=25)])
+            calculator_summary.refresh(user.id)
+            db.session.commit()
+            user_id = user.id
+            expected = _counts(user_id)
+
+            def check(step):
+                db.session.remove()
+                counts = _counts(user_id)
+                dropped.update(set(expected) - set(counts))
+                lost = {name: f"{expected[name]} -> {n}" for name, n in counts.items()
+                        if name not in dropped and n != expected[name]}
+                if lost:
+                    failures.append(f"{step}: {lost}")
+
+            steps = [('downgrade', down) for _, down in revisions]
+            steps += [('upgrade', revision) for revision, _ in reversed(revisions)]
+            for command, revision in steps:
+                try:
+                    (downgrade if command == 'downgrade' else upgrade)(directory=MIGRATIONS, revision=revision)
+                except Exception as e:
+                    failures.append(f"{command} to {revision}: {type(e).__name__}: {str(e).splitlines()[0]}")
+                    break
+                check(f"{command} to {revision}")
+
+            foreign_keys = db.session.execute(db.text('PRAGMA foreign_keys')).scalar()
+            if foreign_keys != 1:
+                failures.append(f"foreign_keys is {foreign_keys} on the app's connections after migrating")
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    print(f"{len(revisions)} revision(s) down to base and back, {sum(expected.values())} row(s) in "
+          f"{len(expected)} per-user table(s), {len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
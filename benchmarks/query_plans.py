@@ -0,0 +1,120 @@
+"""Check that every hot per-user query is served by an index.
+
+Runs each read the calculator pages, tracker, summary and export send, captures the SQL,
+and asks SQLite for its EXPLAIN QUERY PLAN; the per-user DELETEs the save
+endpoints issue are explained without being run. Exits non-zero if any plan
+scans a whole table (or a whole index) instead of searching it by user_id.
+Nothing is written, so it is safe against the app's configured database; run
+`flask db upgrade` first so the indexes exist.
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --user-id 3 --verbose
+"""
+import os
+import io
+import re
+import sys
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from summary_queries import count_statements
+
+_SCAN = re.compile(r'SCAN (\w+)')
+
+
+def hot_reads(user_id):
+    """[(name, callable)] running the app's real per-user reads."""
+    from primetime_toolkit import calculator_summary, data_version, exporter, snapshots, tracker_data
+    from primetime_toolkit.models import (Assessment, LifeExpectancy, Asset, Liability, Income, Expense,
+                                          Subscription, FutureBudget, EpicExperience, IncomeLayer,
+                                          SpendingAllocation, DebtPaydown, EnoughCalculator)
+
+    reads = [
+        ('calculator summary', lambda: calculator_summary.compute(user_id)),
+        ('calculator snapshot', lambda: snapshots.get(user_id, snapshots.CALCULATOR)),
+        ('spreadsheet snapshot', lambda: snapshots.get(user_id, snapshots.SPREADSHEET)),
+        ('tracker load', lambda: tracker_data.load(user_id)),
+        ('data version', lambda: data_version.get(user_id)),
+        ('latest assessment', lambda: Assessment.query.filter_by(user_id=user_id)
+            .order_by(Assessment.submitted_at.desc()).first()),
+        ('dashboard epic items', lambda: EpicExperience.query.filter_by(user_id=user_id, include=True).all()),
+    ]
+    for model in (LifeExpectancy, Asset, Liability, Income, Expense, Subscription, FutureBudget,
+                  EpicExperience, IncomeLayer, SpendingAllocation, DebtPaydown, EnoughCalculator):
+        reads.append((f'{model.__tablename__} rows', lambda m=model: m.query.filter_by(user_id=user_id).all()))
+    for title, _, model, columns in exporter.SHEETS:
+        reads.append((f'export {title}', lambda m=model, c=columns: list(exporter._rows(m, c, user_id))))
+    return reads
+
+
+def hot_deletes(user_id):
+    """[(name, statement)] for the per-user DELETEs the save endpoints and reset send."""
+    from primetime_toolkit.models import db
+    from primetime_toolkit.exporter import SHEETS
+
+    return [(f'{model.__tablename__} delete', db.delete(model).where(model.user_id == user_id))
+            for _, _, model, _ in SHEETS]
+
+
+def explain(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', tuple(parameters or ())).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan, tables):
+    """Plan lines that walk one of tables end to end."""
+    return [detail for detail in plan
+            if (m := _SCAN.match(detail)) and m.group(1) in tables]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--user-id', type=int, default=None, help='defaults to the first user')
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not just failures')
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import func
+    from primetime_toolkit import create_app
+    from primetime_toolkit.models import db, User
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print(f"EXPLAIN QUERY PLAN needs SQLite; the configured database is {db.engine.dialect.name}",
+                  file=sys.stderr)
+            return 2
+        tables = set(db.metadata.tables)
+        user_id = args.user_id
+        if user_id is None:
+            user_id = db.session.execute(db.select(func.min(User.id))).scalar() or 0
+
+        queries = []
+        for name, read in hot_reads(user_id):
+            with count_statements(db.engine) as statements, contextlib.redirect_stdout(io.StringIO()):
+                read()
+            queries += [(name, statement, parameters) for statement, parameters in statements]
+        for name, stmt in hot_deletes(user_id):
+            compiled = stmt.compile(dialect=db.engine.dialect)
+            queries.append((name, str(compiled), [compiled.params[key] for key in compiled.positiontup]))
+
+        failures = 0
+        conn = db.session.connection()
+        for name, statement, parameters in queries:
+            plan = explain(conn, statement, parameters)
+            scans = full_scans(plan, tables)
+            failures += bool(scans)
+            if scans or args.verbose:
+                print(f"{'FAIL' if scans else 'ok'}  {name}")
+                for detail in plan:
+                    print(f"      {detail}")
+        db.session.rollback()
+
+    print(f"{len(queries)} statement(s) explained, {failures} with a full scan")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Check that read-only views read from the read engine and saves write to the writer.
+
+Creates a throwaway SQLite database in a temporary directory, so the read
+engine is the read-only pool on the same file (set DATABASE_READ_URL to test
+a replica instead). It seeds one user, requests every view marked
+@read_only, and posts to every save endpoint, counting the statements each
+engine receives. It also flushes a write inside a read-only request and
+reads it back. The check fails when:
+- a read-only view sends a SELECT to the writer before it has written anything;
+- a save sends anything to the read engine;
+- a read after a flushed write goes to the read engine or misses the write;
+- a request fails.
+
+    python benchmarks/read_routing.py
+    python benchmarks/read_routing.py --verbose
+"""
+import os
+import io
+import sys
+import shutil
+import argparse
+import tempfile
+import contextlib
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from concurrent_saves import ENDPOINTS, PASSWORD, payload
+from tracker_load import seed
+
+
+@contextlib.contextmanager
+def count_by_engine(engines):
+    """Yield a Counter of (engine name, kind) for statements sent while inside.
+
+    kind is 'select', 'other', or 'select after write' for a SELECT that
+    follows something other than a SELECT on the same engine.
+    """
+    from sqlalchemy import event
+
+    counts = Counter()
+    listeners = []
+    for name, engine in engines.items():
+        def listener(conn, cursor, statement, parameters, context, executemany, name=name):
+            kind = 'select' if statement.lstrip().upper().startswith(('SELECT', 'WITH')) else 'other'
+            if kind == 'select' and counts[name, 'other']:
+                kind = 'select after write'
+            counts[name, kind] += 1
+        event.listen(engine, 'before_cursor_execute', listener)
+        listeners.append((engine, listener))
+    try:
+        yield counts
+    finally:
+        for engine, listener in listeners:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=50, help='rows per tracker table')
+    parser.add_argument('--verbose', action='store_true', help='print every request, not just failures')
+    args = parser.parse_args(argv)
+
+    folder = tempfile.mkdtemp(prefix='read-routing-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(folder, 'routing.db')
+
+    import random
+    from werkzeug.security import generate_password_hash
+    from primetime_toolkit import create_app
+    from primetime_toolkit.extension import limiter
+    from flask import g
+    from primetime_toolkit.models import db, User, Asset
+
+    failures, lines = 0, []
+    try:
+        app = create_app()
+        app.config.update(SESSION_COOKIE_SECURE=False, PROPAGATE_EXCEPTIONS=True,
+                          UPLOAD_FOLDER=os.path.join(folder, 'uploads'),
+                          EXPORT_FOLDER=os.path.join(folder, 'exports'))
+        limiter.enabled = False
+        with app.app_context():
+            db.create_all()
+            user = User('routing', 'routing@example.invalid', generate_password_hash(PASSWORD))
+            db.session.add(user)
+            db.session.flush()
+            seed(user.id, args.rows)
+            db.session.commit()
+            user_id = user.id
+            engines = {'writer': db.engine, 'reader': app.extensions['read_engine']}
+        if engines['reader'] is None:
+            print("No read engine: reads go to the writer for this database", file=sys.stderr)
+            return 2
+
+        client = app.test_client()
+        client.post('/auth/login', data={'email': 'routing@example.invalid', 'password': PASSWORD})
+        pages = sorted(rule.rule for rule in app.url_map.iter_rules()
+                       if getattr(app.view_functions[rule.endpoint], 'read_only', False))
+        rnd = random.Random(0)
+        requests = [('GET', page, None) for page in pages]
+        requests += [('POST', endpoint, payload(endpoint, rnd, 5)) for endpoint in ENDPOINTS]
+
+        for method, url, body in requests:
+            with count_by_engine(engines) as counts, contextlib.redirect_stdout(io.StringIO()):
+                response = client.open(url, method=method, json=body)
+            if method == 'GET':
+                wrong = counts['writer', 'select']
+            else:
+                wrong = counts['reader', 'select'] + counts['reader', 'other']
+            failed = bool(wrong) or response.status_code != 200
+            failures += failed
+            if failed or args.verbose:
+                lines.append(f"{'FAIL' if failed else 'ok'}  {method:<4} {url:<28} {response.status_code}  "
+                             f"reader {counts['reader', 'select']} select(s)  "
+                             f"writer {counts['writer', 'select']} select(s), "
+                             f"{counts['writer', 'other']} other, "
+                             f"{counts['writer', 'select after write']} select(s) after")
+
+        with app.test_request_context(), count_by_engine(engines) as counts:
+            g.db_read_only = True
+            db.session.add(Asset(user_id=user_id, category='Cash', description='lazy', amount=1, include=True))
+            db.session.flush()
+            seen = Asset.query.filter_by(user_id=user_id, description='lazy').count()
+            db.session.rollback()
+            Asset.query.filter_by(user_id=user_id).count()
+        failed = seen != 1 or counts['writer', 'select after write'] != 1 or counts['reader', 'select'] != 1
+        failures += failed
+        if failed or args.verbose:
+            lines.append(f"{'FAIL' if failed else 'ok'}  read after a flushed write: saw {seen} row(s), "
+                         f"writer {counts['writer', 'select after write']} select(s) after the write, "
+                         f"reader {counts['reader', 'select']} select(s) after rollback")
+        with app.app_context():
+            db.engine.dispose()
+            engines['reader'].dispose()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print('\n'.join(lines + [f"{len(requests) + 1} request(s) checked, {failures} routed wrongly or failed"]))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
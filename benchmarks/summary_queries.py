@@ -0,0 +1,78 @@
+"""Check how many SQL statements calculator_summary.compute sends.
+
+The summary is built from one SELECT of scalar subqueries plus one UNION ALL
+for the breakdowns; this exits non-zero if that grows past QUERY_BUDGET.
+Nothing is written, so it is safe against the app's configured database.
+
+    python benchmarks/summary_queries.py
+    python benchmarks/summary_queries.py --user-id 3 --repeat 50
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUERY_BUDGET = 2
+
+
+@contextlib.contextmanager
+def count_statements(engine):
+    """Yield a list of the (statement, parameters) executed inside the block."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--user-id', type=int, default=None, help='defaults to the first user')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs after the counted one')
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import func
+    from primetime_toolkit import create_app
+    from primetime_toolkit.models import db, User
+    from primetime_toolkit.calculator_summary import compute
+
+    app = create_app()
+    with app.app_context():
+        user_id = args.user_id
+        if user_id is None:
+            user_id = db.session.execute(db.select(func.min(User.id))).scalar() or 0
+
+        with count_statements(db.engine) as statements, contextlib.redirect_stdout(io.StringIO()):
+            compute(user_id)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(args.repeat):
+                compute(user_id)
+        elapsed = (time.perf_counter() - start) / max(args.repeat, 1)
+        db.session.rollback()
+
+    print(f"user {user_id}: {len(statements)} statement(s), {elapsed * 1000:.2f} ms per summary")
+    if len(statements) > QUERY_BUDGET:
+        for statement, _ in statements:
+            print(f"--\n{statement}", file=sys.stderr)
+        print(f"FAIL: calculator_summary.compute sent {len(statements)} statements "
+              f"(budget {QUERY_BUDGET})", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
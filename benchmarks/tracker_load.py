@@ -0,0 +1,161 @@
+"""Benchmark tracker_data.load against the old per-table ORM loader.
+
+Seeds a throwaway user with --rows rows in every tracker table, checks both
+loaders agree, and times them. Everything runs in one transaction that is
+rolled back, so it is safe against the app's configured database.
+
+    python benchmarks/tracker_load.py
+    python benchmarks/tracker_load.py --rows 20000 --repeat 10
+"""
+import os
+import io
+import sys
+import time
+import random
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from summary_queries import count_statements
+
+FREQUENCIES = ['Weekly', 'Fortnightly', 'Monthly', 'Quarterly', 'Annually', 'Once only']
+
+
+def seed(user_id, rows):
+    """Insert rows items per tracker table for user_id (no commit)."""
+    from primetime_toolkit.models import (db, annual_fields, LifeExpectancy, Asset, Liability, Income, Expense,
+                                          Subscription, FutureBudget, EpicExperience, IncomeLayer,
+                                          SpendingAllocation)
+
+    rnd = random.Random(rows)
+
+    def amount():
+        return round(rnd.uniform(0, 5000), 2)
+
+    def recurring(model, **fields):
+        frequency = rnd.choice(FREQUENCIES)
+        value = amount()
+        return dict(fields, user_id=user_id, amount=value, frequency=frequency,
+                    **annual_fields(model, value, frequency, value * 12 if model is Subscription else None))
+
+    db.session.add(LifeExpectancy(user_id=user_id, gender='female', percentile='50th', current_age=50,
+                                  expected_lifespan=88, years_remaining=38, estimated_year_of_death=2064))
+    tables = {
+        Asset: lambda i: dict(user_id=user_id, category='Cash', description=f'a{i}', amount=amount(),
+                              include=i % 4 != 0),
+        Liability: lambda i: dict(user_id=user_id, category='Loan', name=f'l{i}', amount=amount()),
+        Income: lambda i: recurring(Income, source=f'Job {i % 5}', include=i % 3 != 0),
+        Expense: lambda i: recurring(Expense, category='Food', item=f'e{i}'),
+        Subscription: lambda i: recurring(Subscription, name=f's{i}', include=i % 2 == 0),
+        FutureBudget: lambda i: dict(user_id=user_id, phase=f'p{i}', baseline_cost=amount()),
+        EpicExperience: lambda i: recurring(EpicExperience, item=f'x{i}', include=i % 2 == 0),
+        IncomeLayer: lambda i: dict(user_id=user_id, layer='Super', annual_amount=amount()),
+        SpendingAllocation: lambda i: dict(user_id=user_id, phase=f'p{i}', cost_base=amount()),
+    }
+    for model, make in tables.items():
+        db.session.execute(db.insert(model), [make(i) for i in range(rows)])
+    db.session.flush()
+
+
+def legacy_load(user_id):
+    """The /tracker loader as it was: nine ORM queries, totals summed in Python."""
+    from primetime_toolkit.models import (LifeExpectancy, Asset, Liability, Income, Expense, Subscription,
+                                          FutureBudget, EpicExperience, IncomeLayer, SpendingAllocation)
+
+    life = LifeExpectancy.query.filter_by(user_id=user_id).first()
+    assets = Asset.query.filter_by(user_id=user_id).all()
+    liabilities = Liability.query.filter_by(user_id=user_id).all()
+    income = Income.query.filter_by(user_id=user_id).all()
+    expenses = Expense.query.filter_by(user_id=user_id).all()
+    subscriptions = Subscription.query.filter_by(user_id=user_id).all()
+    future_budget = FutureBudget.query.filter_by(user_id=user_id).all()
+    epic = EpicExperience.query.filter_by(user_id=user_id).all()
+    income_layers = IncomeLayer.query.filter_by(user_id=user_id).all()
+    spending_allocation = SpendingAllocation.query.filter_by(user_id=user_id).all()
+
+    assets_total = sum(a.amount for a in assets if a.amount)
+    liabilities_total = sum(l.amount for l in liabilities if l.amount)
+    income_total = sum(i.amount for i in income if i.amount and i.include)
+    expenses_total = sum(e.amount for e in expenses if e.amount)
+    subscriptions_total = sum(s.annual_amount for s in subscriptions if s.include)
+    net_worth = assets_total - liabilities_total
+    expenses_total += subscriptions_total
+
+    completion_flags = {
+        "life": life is not None,
+        "assets": assets_total > 0,
+        "liabilities": liabilities_total > 0,
+        "income": income_total > 0,
+        "expenses": expenses_total > 0,
+        "subscriptions": subscriptions_total > 0,
+        "future_budget": len(future_budget) > 0,
+        "epic": len(epic) > 0,
+        "income_layers": len(income_layers) > 0,
+        "spending_allocation": len(spending_allocation) > 0,
+        "summary": net_worth != 0
+    }
+    data = {
+        "assets_total": assets_total,
+        "liabilities_total": liabilities_total,
+        "income_total": income_total,
+        "expenses_total": expenses_total,
+        "net_worth": net_worth
+    }
+    return data, completion_flags
+
+
+def _close(a, b):
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+
+
+def timed(load, user_id, repeat):
+    """(statements sent by one call, mean seconds per call over repeat calls)."""
+    from primetime_toolkit.models import db
+
+    db.session.expunge_all()
+    with count_statements(db.engine) as statements:
+        load(user_id)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db.session.expunge_all()           # a fresh request starts with an empty identity map
+        load(user_id)
+    return len(statements), (time.perf_counter() - start) / max(repeat, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=5000, help='rows per tracker table')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per loader')
+    args = parser.parse_args(argv)
+
+    from primetime_toolkit import create_app
+    from primetime_toolkit.models import db, User
+    from primetime_toolkit.tracker_data import load
+
+    app = create_app()
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        user = User('tracker-bench', 'tracker-bench@example.invalid', '')
+        db.session.add(user)
+        db.session.flush()
+        seed(user.id, args.rows)
+
+        old, new = legacy_load(user.id), load(user.id)
+        results = {name: timed(loader, user.id, args.repeat)
+                   for name, loader in (('orm', legacy_load), ('tracker_data', load))}
+        db.session.rollback()
+
+    mismatched = [key for key in old[0] if not _close(old[0][key], new[0][key])]
+    mismatched += [key for key in old[1] if old[1][key] != new[1][key]]
+    print(f"{args.rows} rows per table")
+    for name, (statements, seconds) in results.items():
+        print(f"  {name:<13} {statements:>2} statement(s)  {seconds * 1000:9.2f} ms per load")
+    if mismatched:
+        print(f"FAIL: loaders disagree on {', '.join(mismatched)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
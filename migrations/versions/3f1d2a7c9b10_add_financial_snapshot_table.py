@@ -0,0 +1,44 @@
+"""Add financial_snapshot table
+
+Revision ID: 3f1d2a7c9b10
+Revises: c245674cb768
+Create Date: 2026-10-18 10:12:41.204817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1d2a7c9b10'
+down_revision = 'c245674cb768'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('financial_snapshot',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=16), nullable=False),
+        sa.Column('digest', sa.String(length=64), nullable=True),
+        sa.Column('net_worth', sa.Float(), nullable=True),
+        sa.Column('assets_total', sa.Float(), nullable=True),
+        sa.Column('liabilities_total', sa.Float(), nullable=True),
+        sa.Column('income_annual', sa.Float(), nullable=True),
+        sa.Column('subs_annual', sa.Float(), nullable=True),
+        sa.Column('expenses_annual', sa.Float(), nullable=True),
+        sa.Column('surplus_annual', sa.Float(), nullable=True),
+        sa.Column('epic_annual', sa.Float(), nullable=True),
+        sa.Column('breakdowns', sa.JSON(), nullable=True),
+        sa.Column('series', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'source', name='uq_financial_snapshot_user_source')
+    )
+
+
+def downgrade():
+    op.drop_table('financial_snapshot')
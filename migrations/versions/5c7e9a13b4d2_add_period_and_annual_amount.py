@@ -0,0 +1,62 @@
+"""Add period and annual_amount to income, expense, subscriptions and epic_experiences
+
+Revision ID: 5c7e9a13b4d2
+Revises: 8b4e61d0a2f7
+Create Date: 2026-10-18 14:05:31.207415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7e9a13b4d2'
+down_revision = '8b4e61d0a2f7'
+branch_labels = None
+depends_on = None
+
+
+PERIODS = ['WEEKLY', 'FORTNIGHTLY', 'MONTHLY', 'QUARTERLY', 'ANNUALLY', 'ONCE', 'OTHER']
+
+# Frozen copy of frequency.py at the time of this migration.
+PERIOD_SQL = """CASE lower(frequency)
+    WHEN 'weekly' THEN 'WEEKLY' WHEN 'fortnightly' THEN 'FORTNIGHTLY' WHEN 'monthly' THEN 'MONTHLY'
+    WHEN 'quarterly' THEN 'QUARTERLY' WHEN 'annually' THEN 'ANNUALLY' WHEN 'once only' THEN 'ONCE'
+    ELSE 'OTHER' END"""
+
+
+def per_year_sql(default):
+    return f"""CASE lower(frequency)
+    WHEN 'weekly' THEN 52 WHEN 'fortnightly' THEN 26 WHEN 'monthly' THEN 12
+    WHEN 'quarterly' THEN 4 WHEN 'annually' THEN 1 ELSE {default} END"""
+
+
+def period_column():
+    return sa.Column('period', sa.Enum(*PERIODS, name='period', native_enum=False, length=16), nullable=True)
+
+
+def upgrade():
+    for table in ('income', 'expense', 'epic_experiences'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(period_column())
+            batch_op.add_column(sa.Column('annual_amount', sa.Float(), nullable=True))
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.add_column(period_column())
+
+    for table in ('income', 'expense'):
+        op.execute(f"UPDATE {table} SET period = {PERIOD_SQL}, "
+                   f"annual_amount = COALESCE(amount, 0.0) * {per_year_sql(12)}")
+    op.execute(f"UPDATE subscriptions SET period = {PERIOD_SQL}, "
+               f"annual_amount = COALESCE(annual_amount, COALESCE(amount, 0.0) * {per_year_sql(12)})")
+    op.execute(f"""UPDATE epic_experiences SET period = {PERIOD_SQL}, annual_amount = CASE
+        WHEN lower(frequency) = 'once only' THEN COALESCE(amount, 0.0) / 10.0
+        ELSE COALESCE(amount, 0.0) * {per_year_sql(0)} END""")
+
+
+def downgrade():
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.drop_column('period')
+    for table in ('epic_experiences', 'expense', 'income'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('annual_amount')
+            batch_op.drop_column('period')
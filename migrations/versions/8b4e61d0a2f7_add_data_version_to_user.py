@@ -0,0 +1,26 @@
+"""Add data_version to user
+
+Revision ID: 8b4e61d0a2f7
+Revises: 3f1d2a7c9b10
+Create Date: 2026-10-18 11:40:08.512304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e61d0a2f7'
+down_revision = '3f1d2a7c9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
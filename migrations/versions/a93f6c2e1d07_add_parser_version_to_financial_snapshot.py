@@ -0,0 +1,28 @@
+"""Add parser_version to financial_snapshot
+
+Revision ID: a93f6c2e1d07
+Revises: e7b3c9d15a40
+Create Date: 2026-10-18 21:14:37.902815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93f6c2e1d07'
+down_revision = 'e7b3c9d15a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing spreadsheet snapshots get NULL, which never matches a parser
+    # version, so they are rebuilt the next time their dashboard is opened.
+    with op.batch_alter_table('financial_snapshot', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('parser_version', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('financial_snapshot', schema=None) as batch_op:
+        batch_op.drop_column('parser_version')
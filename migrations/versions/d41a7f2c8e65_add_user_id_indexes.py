@@ -0,0 +1,40 @@
+"""Add per-user indexes to the calculator tables
+
+Revision ID: d41a7f2c8e65
+Revises: 5c7e9a13b4d2
+Create Date: 2026-10-18 16:22:47.930118
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a7f2c8e65'
+down_revision = '5c7e9a13b4d2'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_assessment_user_id_submitted_at', 'assessment', ['user_id', 'submitted_at']),
+    ('ix_life_expectancy_user_id', 'life_expectancy', ['user_id']),
+    ('ix_asset_user_id_include_amount', 'asset', ['user_id', 'include', 'amount']),
+    ('ix_liability_user_id_amount', 'liability', ['user_id', 'amount']),
+    ('ix_income_user_id_include_source_annual_amount', 'income', ['user_id', 'include', 'source', 'annual_amount']),
+    ('ix_expense_user_id_annual_amount', 'expense', ['user_id', 'annual_amount']),
+    ('ix_subscriptions_user_id_include_annual_amount', 'subscriptions', ['user_id', 'include', 'annual_amount']),
+    ('ix_future_budget_user_id', 'future_budget', ['user_id']),
+    ('ix_epic_experiences_user_id_include_annual_amount', 'epic_experiences', ['user_id', 'include', 'annual_amount']),
+    ('ix_income_layer_user_id', 'income_layer', ['user_id']),
+    ('ix_spending_allocation_user_id', 'spending_allocation', ['user_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,60 @@
+"""Cascade deletes from user to every per-user table
+
+Revision ID: e7b3c9d15a40
+Revises: d41a7f2c8e65
+Create Date: 2026-10-18 18:05:12.417302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c9d15a40'
+down_revision = 'd41a7f2c8e65'
+branch_labels = None
+depends_on = None
+
+
+TABLES = [
+    'assessment', 'life_expectancy', 'asset', 'liability', 'income', 'expense', 'subscriptions',
+    'future_budget', 'epic_experiences', 'income_layer', 'spending_allocation', 'debt_paydown',
+    'enough_calculator', 'financial_snapshot',
+]
+
+# Lets batch mode on SQLite find the foreign keys create_all left unnamed.
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _name(table):
+    return f'fk_{table}_user_id_user'
+
+
+def _user_fk(table):
+    """Name of table's existing foreign key to user.id, or None if it has none."""
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk['referred_table'] == 'user' and fk['constrained_columns'] == ['user_id']:
+            return fk['name'] or _name(table)
+    return None
+
+
+def _replace_fks(ondelete):
+    for table in TABLES:
+        existing = _user_fk(table)
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            if existing:
+                batch_op.drop_constraint(existing, type_='foreignkey')
+            if ondelete or table != 'debt_paydown':
+                batch_op.create_foreign_key(_name(table), 'user', ['user_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    # Rows left behind by users deleted before this migration would fail the new constraints.
+    for table in TABLES:
+        op.execute(f'DELETE FROM {table} WHERE user_id IS NOT NULL AND user_id NOT IN (SELECT id FROM "user")')
+    _replace_fks('CASCADE')
+
+
+def downgrade():
+    # debt_paydown had no foreign key before this revision.
+    _replace_fks(None)
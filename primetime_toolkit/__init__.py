@@ -1,5 +1,7 @@
 import os
+import multiprocessing
 from .extension import db, mail, login_manager, limiter, migrate
+from . import engine
 from datetime import timedelta
 from flask_login import current_user
 from flask import Flask, Blueprint, render_template, request, redirect, url_for, flash, session
@@ -12,9 +14,21 @@ def create_app():
     app.config['SESSION_COOKIE_HTTPONLY'] = True 
     app.config['SESSION_COOKIE_SECURE'] = True 
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///primetime.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = engine.database_url()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')
+    app.config['UPLOAD_KEEP_VERSIONS'] = 3
+    app.config['UPLOAD_MAX_AGE_DAYS'] = 180
+    app.config['EXPORT_FOLDER'] = os.path.join(app.instance_path, 'exports')
+    app.config['PARSE_CACHE_FOLDER'] = os.path.join(app.instance_path, 'parse_cache')
+    app.config['PARSE_CACHE_SIZE'] = 32
+    app.config['PARSE_SHEET_CACHE_SIZE'] = 1024
+    app.config['SUMMARY_CACHE_SIZE'] = 1024
+    app.config['PARSE_WORKERS'] = int(os.environ.get('PARSE_WORKERS', 2))
+    app.config['PARSE_QUEUE_DEPTH'] = int(os.environ.get('PARSE_QUEUE_DEPTH', 8))
+    app.config['PARSE_START_METHOD'] = os.environ.get(
+        'PARSE_START_METHOD', 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
 
     app.config['MAIL_SERVER'] = 'smtp.gmail.com'
     app.config['MAIL_PORT'] = 587
@@ -27,6 +41,7 @@ def create_app():
 
 
     db.init_app(app)
+    engine.configure(app, db)
     mail.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
@@ -48,6 +63,15 @@ def create_app():
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(chatbot_bp, url_prefix='/chatbot')
 
+    from .upload_store import sweep_uploads_command
+    from .bulk_import import import_workbooks_command
+    from .calculator_summary import check_summaries_command
+    from .accounts import erase_user_command
+    app.cli.add_command(sweep_uploads_command)
+    app.cli.add_command(import_workbooks_command)
+    app.cli.add_command(check_summaries_command)
+    app.cli.add_command(erase_user_command)
+
 
 
     @app.after_request
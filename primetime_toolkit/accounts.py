@@ -0,0 +1,72 @@
+import os
+import shutil
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from . import calculator_summary, data_version, parse_cache, upload_store
+from .models import db, User, FinancialSnapshot
+
+
+# Whole-account data operations. Every per-user table cascades from user.id, so
+# erasing an account is one DELETE of the user row; a reset keeps the account
+# and clears everything the user entered in one transaction.
+
+def user_tables():
+    """Tables whose rows belong to a user: those with a cascading foreign key to user.id."""
+    return [
+        table for table in db.metadata.sorted_tables
+        if any(fk.column.table is User.__table__ and fk.ondelete == 'CASCADE' for fk in table.foreign_keys)
+    ]
+
+
+def tracker_tables():
+    """What "Reset tracker" clears: every user table except the dashboard snapshots.
+
+    The calculator snapshot is rebuilt by the reset itself, and the spreadsheet
+    snapshot mirrors the uploaded workbook, which a reset keeps.
+    """
+    return [table for table in user_tables() if table is not FinancialSnapshot.__table__]
+
+
+def reset(user_id):
+    """Clear user_id's calculators and assessments, keeping the account and uploads (no commit).
+
+    One DELETE per tracker table, all in the caller's transaction.
+    """
+    for table in tracker_tables():
+        db.session.execute(db.delete(table).where(table.c.user_id == user_id))
+    data_version.bump(user_id)
+    calculator_summary.refresh(user_id)
+
+
+def erase(user_id):
+    """Delete user_id and, through ON DELETE CASCADE, all of their rows (no commit).
+
+    Returns whether the user existed.
+    """
+    return db.session.execute(db.delete(User).where(User.id == user_id)).rowcount == 1
+
+
+def remove_files(user_id):
+    """Delete user_id's uploads, exports and everything parsed from their uploads."""
+    for path in upload_store.versions(user_id):
+        parse_cache.evict_file(path)
+    for setting in ('UPLOAD_FOLDER', 'EXPORT_FOLDER'):
+        shutil.rmtree(os.path.join(current_app.config[setting], str(int(user_id))), ignore_errors=True)
+
+
+@click.command('erase-user')
+@click.argument('user_id', type=int)
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation.')
+@with_appcontext
+def erase_user_command(user_id, yes):
+    """Permanently delete a user account with all of its data, uploads and exports."""
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise click.ClickException(f"No user {user_id}.")
+    if not yes:
+        click.confirm(f"Erase user {user_id} ({user.email}) and all of their data?", abort=True)
+    erase(user_id)
+    db.session.commit()
+    remove_files(user_id)
+    click.echo(f"Erased user {user_id}.")
@@ -13,6 +13,7 @@ import io
 import base64
 from flask_mail import Message
 from .utils import generate_email_otp
+from .views import get_calculator_summary
 
 
 
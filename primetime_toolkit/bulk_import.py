@@ -0,0 +1,170 @@
+import io
+import os
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+from . import calculator_summary, data_version, parse_cache
+from .excel_parser import parse_excel
+from .models import db, annual_fields, User, Asset, Liability, Income, Expense, Subscription, EpicExperience
+
+
+# Onboarding import: parse a folder of filled-in toolkit workbooks in a process
+# pool and load them into the web-calculator tables. Each file is matched to a
+# user by its name (<email>.xlsx or <user id>.xlsx); every user is written in
+# one transaction with batched INSERTs.
+
+EXTENSIONS = ('.xlsx', '.xls')
+BATCH_SIZE = 1000
+IMPORTED_MODELS = [Asset, Liability, Income, Expense, Subscription, EpicExperience]
+IMPORTED_SECTIONS = ('assets', 'liabilities', 'income', 'expenses', 'subscriptions', 'epic')
+
+
+def _parse_quietly(path, sheet_cache):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_excel(path, sheet_cache=sheet_cache)
+
+
+def _text(value, default=''):
+    if value is None or (isinstance(value, float) and value != value):
+        return default
+    return str(value).strip() or default
+
+
+def rows_from_result(user_id, data):
+    """Map a parse_excel result to {Model: [row dicts]} for the calculator tables."""
+    subs = data.get('subscriptions', {}).get('items', [])
+    sub_ids = {id(s) for s in subs}
+    # build_result appends the subscription items to the expense items; keep them apart here.
+    expenses = [e for e in data.get('expenses', {}).get('items', []) if id(e) not in sub_ids]
+
+    rows = {model: [] for model in IMPORTED_MODELS}
+    for a in data.get('assets', {}).get('items', []):
+        rows[Asset].append(dict(user_id=user_id, category=a['label'], description='',
+                                amount=a['value'], owner='', include=True))
+    for l in data.get('liabilities', {}).get('items', []):
+        rows[Liability].append(dict(user_id=user_id, category=l['label'], name=l['label'],
+                                    amount=l['value'], type='', monthly=0.0, notes=''))
+    for i in data.get('income', {}).get('items', []):
+        rows[Income].append(dict(user_id=user_id, source=i['label'], amount=i['value'],
+                                 frequency=_text(i.get('frequency'), 'Monthly'), notes='', include=True))
+    for e in expenses:
+        rows[Expense].append(dict(user_id=user_id, category=e['label'], item=e['label'], amount=e['value'],
+                                  frequency=_text(e.get('frequency'), 'Monthly'), type='Essential'))
+    for s in subs:
+        rows[Subscription].append(dict(user_id=user_id, name=s['label'], provider='', amount=s['value'],
+                                       frequency=_text(s.get('frequency'), 'monthly').lower(), notes='',
+                                       include=True))
+    for x in data.get('epic', {}).get('items', []):
+        rows[EpicExperience].append(dict(user_id=user_id, item=x['label'], amount=x['value'],
+                                         frequency=_text(x.get('frequency'), 'Once only'), include=True))
+
+    # Core INSERTs bypass the ORM hooks that annualise rows, so fill those columns
+    # here with the same helper (unknown frequencies count as monthly).
+    for model in (Income, Expense, Subscription, EpicExperience):
+        for row in rows[model]:
+            row.update(annual_fields(model, row['amount'], row['frequency']))
+    return rows
+
+
+def import_user(user_id, data):
+    """Replace user_id's calculator rows with a parsed workbook in one transaction."""
+    rows = rows_from_result(user_id, data)
+    try:
+        for model in IMPORTED_MODELS:
+            model.query.filter_by(user_id=user_id).delete()
+            batch = rows[model]
+            for start in range(0, len(batch), BATCH_SIZE):
+                db.session.execute(insert(model), batch[start:start + BATCH_SIZE])
+        calculator_summary.refresh(user_id, IMPORTED_SECTIONS)
+        data_version.bump(user_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return sum(len(batch) for batch in rows.values())
+
+
+def match_users(paths):
+    """Map each workbook to a user id by file name; returns (matches, failures)."""
+    stems = {path: os.path.splitext(os.path.basename(path))[0].strip() for path in paths}
+    emails = {s.lower() for s in stems.values() if '@' in s}
+    ids = {int(s) for s in stems.values() if s.isdigit()}
+    users = User.query.filter(db.or_(db.func.lower(User.email).in_(emails), User.id.in_(ids))).all()
+    by_email = {u.email.lower(): u.id for u in users}
+    by_id = {u.id for u in users}
+
+    matches, failures, seen = {}, {}, {}
+    for path, stem in sorted(stems.items()):
+        if '@' in stem:
+            user_id = by_email.get(stem.lower())
+        else:
+            user_id = int(stem) if stem.isdigit() and int(stem) in by_id else None
+        if user_id is None:
+            failures[path] = f"no user matches '{stem}'"
+        elif user_id in seen:
+            failures[path] = f"user {user_id} already imported from {os.path.basename(seen[user_id])}"
+        else:
+            matches[path], seen[user_id] = user_id, path
+    return matches, failures
+
+
+def _parse_all(pool, matches):
+    """Yield (path, user_id, result or exception): cached workbooks first, then as parses finish."""
+    futures, cached = {}, []
+    sheets = parse_cache.sheet_cache()
+    for path, user_id in matches.items():
+        digest, data = parse_cache.lookup(path)
+        if data is not None:
+            cached.append((path, user_id, data))
+        else:
+            futures[pool.submit(_parse_quietly, path, sheets)] = (path, user_id, digest)
+
+    yield from cached
+    for future in as_completed(futures):
+        path, user_id, digest = futures[future]
+        try:
+            data = future.result()
+        except Exception as e:
+            yield path, user_id, e
+            continue
+        parse_cache.store(digest, data)
+        yield path, user_id, data
+
+
+@click.command('import-workbooks')
+@click.argument('folder', type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', type=int, default=None, help='Parser processes (default: PARSE_WORKERS).')
+@with_appcontext
+def import_workbooks_command(folder, workers):
+    """Import every workbook in FOLDER into the calculator tables.
+
+    Files are named after their owner: <email>.xlsx or <user id>.xlsx.
+    Existing calculator rows of those users are replaced.
+    """
+    paths = [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+             if f.lower().endswith(EXTENSIONS) and not f.startswith('~$')]
+    matches, failures = match_users(paths)
+    workers = workers or current_app.config.get('PARSE_WORKERS', 2)
+
+    start = time.perf_counter()
+    imported = rows = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, user_id, data in _parse_all(pool, matches):
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                rows += import_user(user_id, data)
+                imported += 1
+            except Exception as e:
+                failures[path] = str(e) or e.__class__.__name__
+
+    elapsed = time.perf_counter() - start
+    for path, reason in sorted(failures.items()):
+        click.echo(f"FAILED {os.path.basename(path)}: {reason}", err=True)
+    rate = imported / elapsed if elapsed else 0.0
+    click.echo(f"Imported {imported} workbook(s), {rows} row(s) in {elapsed:.1f}s "
+               f"({rate:.2f} workbooks/s); {len(failures)} failed.")
@@ -0,0 +1,379 @@
+import math
+from . import calculator_summary, data_version
+from .models import (db, annual_fields, LifeExpectancy, Asset, Liability, Income, Expense, Subscription,
+                     FutureBudget, EpicExperience, IncomeLayer, SpendingAllocation, DebtPaydown, EnoughCalculator)
+
+
+# Saving a calculator table. The page posts the whole table, and rows it loaded
+# carry their id; the post is diffed against the stored rows and only the
+# difference is written, with one bulk INSERT, UPDATE and DELETE at most.
+# Saving an unchanged table writes nothing. save_all takes any subset of the
+# calculators at once, validating all of them before writing any. patch is the
+# autosave path: it reads and writes only the rows it names, guarded by the
+# user's data_version.
+
+
+class StaleVersion(Exception):
+    pass
+
+def _float(v):
+    """v as a number; blank counts as 0, anything non-numeric raises ValueError or TypeError."""
+    if v is None or v == '':
+        return 0.0
+    number = float(v)
+    if not math.isfinite(number):
+        raise ValueError(f"not a finite number: {v!r}")
+    return number
+
+
+def _int(v):
+    return int(_float(v))
+
+
+def _optional_int(v):
+    return None if v is None or v == '' else _int(v)
+
+
+def _annualised(model, fields):
+    # Bulk statements bypass the ORM hooks that annualise rows, so fill those columns here.
+    fields.update(annual_fields(model, fields['amount'], fields['frequency'], fields.get('annual_amount')))
+    return fields
+
+
+# ---------- Posted row -> column values ----------
+
+def _asset(a):
+    return dict(category=a['category'], description=a['description'], amount=_float(a['amount']),
+                owner=a['owner'], include=a['include'])
+
+
+def _liability(l):
+    return dict(category=l['category'], name=l['name'], amount=_float(l['amount']), type=l['type'],
+                monthly=_float(l['monthly']), notes=l['notes'])
+
+
+def _income(i):
+    return _annualised(Income, dict(
+        source=i.get('source', ''),
+        amount=_float(i.get('amount')),
+        frequency=i.get('frequency', ''),
+        notes=i.get('notes', ''),
+        include=i.get('include', True),
+    ))
+
+
+def _expense(e):
+    return _annualised(Expense, dict(
+        category=e.get("category", ""),
+        item=e.get("item", ""),
+        amount=_float(e.get("amount")),
+        frequency=e.get("frequency", "monthly"),
+        type=e.get("type", "Essential"),
+    ))
+
+
+def _subscription(s):
+    return _annualised(Subscription, dict(
+        name=s.get('name', ''),
+        provider=s.get('provider', ''),
+        amount=_float(s.get('amount')),
+        frequency=(s.get('frequency', 'monthly') or 'monthly').lower(),
+        notes=s.get('notes', ''),
+        include=bool(s.get('include', False)),
+        annual_amount=_float(s['annual_amount']) if s.get('annual_amount') is not None else None,
+    ))
+
+
+def _future_budget(b):
+    return dict(
+        phase=b.get('phase', ''),
+        age_range=b.get('age_range', ''),
+        years_in_phase=_int(b.get('years_in_phase')),
+        baseline_cost=_float(b.get('baseline_cost')),
+        oneoff_costs=_float(b.get('oneoff_costs')),
+        epic_experiences=_float(b.get('epic_experiences')),
+        total_annual_budget=_float(b.get('total_annual_budget')),
+    )
+
+
+def _epic(it):
+    return _annualised(EpicExperience, dict(
+        item=it.get('item', ''),
+        amount=_float(it.get('amount')),
+        frequency=it.get('frequency') or 'Once only',
+        include=bool(it.get('include', True)),
+    ))
+
+
+def _income_layer(item):
+    return dict(
+        layer=item.get('layer', ''),
+        description=item.get('description', ''),
+        start_age=_optional_int(item.get('start_age')),
+        end_age=_optional_int(item.get('end_age')),
+        annual_amount=_float(item.get('annual_amount')),
+    )
+
+
+def _spending(item):
+    return dict(
+        phase=item.get('phase', ''),
+        cost_base=_float(item.get('cost_base')),
+        cost_life=_float(item.get('cost_life')),
+        cost_save=_float(item.get('cost_save')),
+        cost_health=_float(item.get('cost_health')),
+        cost_other=_float(item.get('cost_other')),
+    )
+
+
+def _debt(d):
+    return dict(
+        name=d.get('name', '') or d.get('debt_name', ''),
+        principal=_float(d.get('principal')),
+        annual_interest_rate=_float(d.get('annual_interest_rate')),
+        monthly_payment=_float(d.get('monthly_payment')),
+        years_to_repay=(_float(d.get('years_to_repay')) or None),
+        include=bool(d.get('include', True)),
+    )
+
+
+def _life_expectancy(data):
+    return dict(
+        gender=data["gender"],
+        percentile=data["percentile"],
+        current_age=int(data["current_age"]),
+        expected_lifespan=int(data["expected_lifespan"]),
+        years_remaining=int(data["years_remaining"]),
+        estimated_year_of_death=int(data["estimated_year_of_death"]),
+    )
+
+
+def _enough(payload):
+    return dict(
+        use_future_budget=payload.get('use_future_budget', 'Yes'),
+        manual_annual=_float(payload.get('manual_annual')),
+        real_rate=_float(payload.get('real_rate')),
+        years=_int(payload.get('years')),
+        pension=_float(payload.get('pension')),
+        part_time_income=_float(payload.get('part_time_income')),
+        part_time_years=_float(payload.get('part_time_years')),
+        shortfall=_float(payload.get('shortfall')),
+        lump_sum_rule=_float(payload.get('lump_sum_rule')),
+        lump_sum_annuity=_float(payload.get('lump_sum_annuity')),
+    )
+
+
+# name -> (model, calculator_summary section or None, row builder)
+CALCULATORS = {
+    'assets':          (Asset, 'assets', _asset),
+    'liabilities':     (Liability, 'liabilities', _liability),
+    'income':          (Income, 'income', _income),
+    'expenses':        (Expense, 'expenses', _expense),
+    'subscriptions':   (Subscription, 'subscriptions', _subscription),
+    'future_budget':   (FutureBudget, 'future_budget', _future_budget),
+    'epic':            (EpicExperience, 'epic', _epic),
+    'income_layers':   (IncomeLayer, None, _income_layer),
+    'spending':        (SpendingAllocation, None, _spending),
+    'debt_paydown':    (DebtPaydown, None, _debt),
+}
+
+# Single-form calculators: name -> (model, form builder, replace previous rows?).
+# Life expectancy estimates are kept as a history; the page shows the latest.
+FORMS = {
+    'life_expectancy':   (LifeExpectancy, _life_expectancy, False),
+    'enough_calculator': (EnoughCalculator, _enough, True),
+}
+
+
+def epic_years(value):
+    """The epic-experience horizon posted with the epic table, in whole years (at least 1)."""
+    try:
+        years = _int(value)
+        if years < 1:
+            raise ValueError("must be at least 1")
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"epic_years: {type(e).__name__}: {e}") from e
+    return years
+
+
+def _row_id(item):
+    try:
+        return int(item.get('id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _same(stored, posted):
+    if stored == posted:
+        return True
+    # A number posted as text ('12.5') is stored as a number; compare it as one.
+    if isinstance(stored, (int, float)) and not isinstance(stored, bool):
+        try:
+            return float(stored) == float(posted)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def build(name, posted):
+    """Column values for a posted table ([(row id or None, values)]) or form; raises ValueError when malformed."""
+    try:
+        if name in FORMS:
+            if not isinstance(posted, dict):
+                raise TypeError("expected an object")
+            return FORMS[name][1](posted)
+        if name not in CALCULATORS:
+            raise KeyError("unknown calculator")
+        if not isinstance(posted, list):
+            raise TypeError("expected a list of rows")
+        return [(_row_id(item), CALCULATORS[name][2](item)) for item in posted]
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{name}: {type(e).__name__}: {e}") from e
+
+
+def diff(name, user_id, posted):
+    """(inserts, updates, deletes) that turn user_id's stored rows into the built table posted.
+
+    Rows carrying the id of one of the user's rows update it when a value
+    differs; other rows (no id, an unknown id or a repeated one) are new;
+    stored rows not posted are deleted.
+    """
+    model = CALCULATORS[name][0]
+    columns = list(dict.fromkeys(key for _, values in posted for key in values))
+    stored = {
+        row.id: row._mapping
+        for row in db.session.execute(
+            db.select(model.id, *[getattr(model, c) for c in columns]).where(model.user_id == user_id))
+    }
+
+    inserts, updates, kept = [], [], set()
+    for row_id, values in posted:
+        current = stored.get(row_id)
+        if current is None or row_id in kept:
+            inserts.append(dict(values, user_id=user_id))
+            continue
+        kept.add(row_id)
+        if not all(_same(current[key], value) for key, value in values.items()):
+            updates.append(dict(values, id=row_id))
+    deletes = [row_id for row_id in stored if row_id not in kept]
+    return inserts, updates, deletes
+
+
+def _write_table(name, user_id, posted):
+    model = CALCULATORS[name][0]
+    inserts, updates, deletes = diff(name, user_id, posted)
+    if deletes:
+        db.session.execute(db.delete(model).where(model.user_id == user_id, model.id.in_(deletes)))
+    if updates:
+        db.session.execute(db.update(model), updates)
+    if inserts:
+        db.session.execute(db.insert(model), inserts)
+    return {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deletes)}
+
+
+def _write_form(name, user_id, values):
+    model, _, replace = FORMS[name]
+    deleted = 0
+    if replace:
+        deleted = db.session.execute(db.delete(model).where(model.user_id == user_id)).rowcount
+    db.session.execute(db.insert(model), [dict(values, user_id=user_id)])
+    return {'inserted': 1, 'updated': 0, 'deleted': deleted}
+
+
+def save_all(user_id, document):
+    """Write every calculator in document ({name: posted table or form}) for user_id.
+
+    Everything is validated before the first write, so a ValueError means
+    nothing was written. Runs in the caller's transaction (the caller commits);
+    data_version is bumped once and the affected summary sections refreshed
+    together. Returns {name: {'inserted': n, 'updated': n, 'deleted': n}}.
+    """
+    built = {name: build(name, posted) for name, posted in document.items()}
+
+    counts, sections = {}, []
+    for name, values in built.items():
+        if name in FORMS:
+            counts[name] = _write_form(name, user_id, values)
+        else:
+            counts[name] = _write_table(name, user_id, values)
+            section = CALCULATORS[name][1]
+            if section and any(counts[name].values()):
+                sections.append(section)
+
+    if any(n for c in counts.values() for n in c.values()):
+        data_version.bump(user_id)
+        if sections:
+            calculator_summary.refresh(user_id, tuple(sections))
+    return counts
+
+
+def patch(name, user_id, version, upserts=(), deletes=()):
+    """Row-level changes to one calculator table, applied only while user_id is at version.
+
+    upserts are partial rows: one with an id updates that row (fields it omits
+    keep their stored value) and one without is inserted; deletes are row ids.
+    Only the named rows are read. Raises StaleVersion when the user's data has
+    moved past version and ValueError for a malformed patch, in both cases
+    before writing. Returns (counts, ids of the inserted rows in upsert order,
+    the new version). Runs in the caller's transaction (the caller commits).
+    """
+    model, section, _ = CALCULATORS[name]
+    if not isinstance(upserts, list) or not isinstance(deletes, list):
+        raise ValueError(f"{name}: upsert and delete must be lists")
+    ids = [_row_id(item) if isinstance(item, dict) else None for item in upserts]
+    try:
+        deletes = {int(row_id) for row_id in deletes}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{name}: bad row id in delete: {e}") from e
+
+    named = {row_id for row_id in ids if row_id is not None} | deletes
+    stored = {
+        row.id: dict(row._mapping)
+        for row in db.session.execute(
+            db.select(*model.__table__.columns).where(model.user_id == user_id, model.id.in_(named)))
+    } if named else {}
+
+    # Where annual_amount follows from amount and frequency, never keep the stored
+    # or posted value: the builder recomputes it from the patched row.
+    derived = {'annual_amount'} if 'frequency' in model.__table__.c else set()
+
+    inserts, updates = [], []
+    for row_id, item in zip(ids, upserts):
+        if isinstance(item, dict):
+            item = {key: value for key, value in item.items() if key not in derived}
+        if row_id is None:
+            inserts.append(dict(build(name, [item])[0][1], user_id=user_id))
+            continue
+        if row_id not in stored or row_id in deletes:
+            raise ValueError(f"{name}: no row {row_id} to update")
+        current = stored[row_id]
+        merged = {key: value for key, value in dict(current, **item).items() if key not in derived}
+        values = build(name, [merged])[0][1]
+        if not all(_same(current[key], value) for key, value in values.items()):
+            updates.append(dict(values, id=row_id))
+    deletes = [row_id for row_id in deletes if row_id in stored]
+
+    counts = {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deletes)}
+    if not (inserts or updates or deletes):
+        if data_version.get(user_id) != version:
+            raise StaleVersion()
+        return counts, [], version
+    if not data_version.bump_if(user_id, version):
+        raise StaleVersion()
+
+    if deletes:
+        db.session.execute(db.delete(model).where(model.user_id == user_id, model.id.in_(deletes)))
+    if updates:
+        db.session.execute(db.update(model), updates)
+    new_ids = []
+    if inserts:
+        new_ids = db.session.execute(
+            db.insert(model).returning(model.id, sort_by_parameter_order=True), inserts).scalars().all()
+    if section:
+        calculator_summary.refresh(user_id, (section,))
+    return counts, new_ids, version + 1
+
+
+def sync(name, user_id, items):
+    """save_all for a single calculator table; returns its counts."""
+    return save_all(user_id, {name: items})[name]
@@ -0,0 +1,250 @@
+import math
+import threading
+from collections import OrderedDict
+import click
+from blinker import Namespace
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from . import data_version, snapshots
+from .models import db, User, Asset, Liability, Income, Expense, Subscription, FutureBudget, EpicExperience
+
+
+# Web-calculator summary (summary page, web dashboard, profile). It is stored in
+# the user's calculator snapshot, and every save_* endpoint refreshes just the
+# sections it wrote, inside its own transaction, so reads are a single row
+# lookup. check-summaries recomputes everything to find and repair drift.
+# On top of that, finished payloads are cached in memory per (user, data_version);
+# every save bumps the version, so a hit never needs to touch the database.
+
+# Income, expense, subscription and epic rows carry annual_amount, set when they
+# are written (see models.annual_fields), so every total here is a plain SUM.
+SECTIONS = ('assets', 'liabilities', 'income', 'subscriptions', 'expenses', 'epic', 'future_budget')
+
+
+def _total(expr, *criteria):
+    """Scalar subquery: COALESCE(SUM(expr), 0) over the rows matching criteria."""
+    return db.session.query(func.coalesce(func.sum(expr), 0.0)).filter(*criteria).scalar_subquery()
+
+
+def _section_columns(uid, section):
+    """Labelled scalar subqueries that make up one section's totals."""
+    if section == 'assets':
+        return [_total(Asset.amount, Asset.user_id == uid, Asset.include == True).label('assets_total')]
+    if section == 'liabilities':
+        return [_total(Liability.amount, Liability.user_id == uid).label('liabilities_total')]
+    if section == 'income':
+        return [_total(Income.annual_amount, Income.user_id == uid, Income.include == True).label('income_annual')]
+    if section == 'subscriptions':
+        return [_total(Subscription.annual_amount, Subscription.user_id == uid,
+                       Subscription.include == True).label('subs_annual')]
+    if section == 'expenses':
+        return [_total(Expense.annual_amount, Expense.user_id == uid).label('expense_buckets_sum')]
+    if section == 'epic':
+        return [_total(EpicExperience.annual_amount, EpicExperience.user_id == uid,
+                       EpicExperience.include == True).label('epic_annual')]
+    if section == 'future_budget':
+        return [
+            _total(func.coalesce(column, 0.0), FutureBudget.user_id == uid).label(name)
+            for name, column in (('baseline', FutureBudget.baseline_cost),
+                                 ('oneoff', FutureBudget.oneoff_costs),
+                                 ('epic', FutureBudget.epic_experiences),
+                                 ('total', FutureBudget.total_annual_budget))
+        ]
+    raise ValueError(f"Unknown summary section: {section}")
+
+
+def _breakdowns(uid, sections):
+    """Income per source and each subscription's annual cost, in one UNION ALL."""
+    parts = []
+    if 'income' in sections:
+        parts.append(db.session.query(
+            db.literal('income').label('kind'),
+            Income.source.label('label'),
+            func.coalesce(func.sum(Income.annual_amount), 0.0).label('value'),
+            func.min(Income.id).label('position'),
+        ).filter(Income.user_id == uid, Income.include == True).group_by(Income.source))
+    if 'subscriptions' in sections:
+        parts.append(db.session.query(
+            db.literal('subs').label('kind'),
+            Subscription.name.label('label'),
+            func.coalesce(Subscription.annual_amount, 0.0).label('value'),
+            Subscription.id.label('position'),
+        ).filter(Subscription.user_id == uid, Subscription.include == True))
+    if not parts:
+        return {}
+
+    query = parts[0].union_all(*parts[1:]) if len(parts) > 1 else parts[0]
+    breakdown = query.subquery()
+    rows = db.session.query(breakdown).order_by(breakdown.c.kind, breakdown.c.position).all()
+
+    result = {}
+    if 'income' in sections:
+        result['income_breakdown'] = [
+            {"label": label or 'Other', "value": float(value or 0.0)}
+            for kind, label, value, _ in rows if kind == 'income'
+        ]
+    if 'subscriptions' in sections:
+        result['subs_breakdown'] = [
+            {"label": label or "Unnamed", "value": float(value or 0.0)}
+            for kind, label, value, _ in rows if kind == 'subs'
+        ]
+    return result
+
+
+def totals(user_id, sections=SECTIONS):
+    """Recompute the given sections' parts of the summary (at most two queries)."""
+    row = db.session.query(*[c for s in sections for c in _section_columns(user_id, s)]).one()
+    parts = {}
+    for section in sections:
+        if section == 'future_budget':
+            parts['budget_targets'] = {
+                "baseline": float(row.baseline or 0.0),
+                "oneoff":   float(row.oneoff or 0.0),
+                "epic":     float(row.epic or 0.0),
+                "total":    float(row.total or 0.0),
+            }
+    for key in ('assets_total', 'liabilities_total', 'income_annual', 'subs_annual', 'expense_buckets_sum', 'epic_annual'):
+        if key in row._fields:
+            parts[key] = getattr(row, key)
+    parts.update(_breakdowns(user_id, sections))
+    return parts
+
+
+def summarise(parts):
+    """The full get_calculator_summary dict from the per-section parts."""
+    assets_total = parts["assets_total"] or 0.0
+    liabilities_total = parts["liabilities_total"] or 0.0
+    income_annual = parts["income_annual"] or 0.0
+    subs_annual = parts["subs_annual"] or 0.0
+    expense_buckets_sum = parts["expense_buckets_sum"] or 0.0
+    epic_annual = parts["epic_annual"] or 0.0
+
+    # subscription counts to Expenses
+    expenses_annual = subs_annual + expense_buckets_sum + epic_annual
+    surplus_annual = income_annual - expenses_annual
+    return {
+        "assets_total": assets_total,
+        "liabilities_total": liabilities_total,
+        "income_annual": income_annual,
+        "income_breakdown": parts["income_breakdown"],
+        "subs_annual": subs_annual,
+        "subs_breakdown": parts["subs_breakdown"],
+        "expense_buckets_sum": expense_buckets_sum,
+        "epic_annual": epic_annual,
+        "expenses_annual": expenses_annual,
+        "net_worth": assets_total - liabilities_total,
+        "surplus_annual": surplus_annual,
+        "surplus_monthly": surplus_annual / 12.0,
+        "actual_breakdown": [
+            {"label": "Bills/Subscriptions", "value": float(subs_annual)},
+            {"label": "Expenses",             "value": float(expense_buckets_sum)},
+            {"label": "Epic Experiences",     "value": float(epic_annual)},
+        ],
+        "budget_targets": parts["budget_targets"],
+    }
+
+
+def compute(user_id):
+    return summarise(totals(user_id))
+
+
+def refresh(user_id, sections=SECTIONS):
+    """Bring the stored summary up to date after a write to sections.
+
+    Runs in the caller's transaction (the caller commits). The snapshot row is
+    locked first so concurrent saves of different sections cannot overwrite
+    each other's totals.
+    """
+    row = snapshots.get(user_id, snapshots.CALCULATOR, for_update=True)
+    parts = snapshots.calculator_summary(row) if row is not None else {}
+    parts.update(totals(user_id, sections if row is not None else SECTIONS))
+    return snapshots.write_calculator(user_id, summarise(parts))
+
+
+def load(user_id):
+    """The stored summary, built and saved first for users who have no row yet."""
+    row = snapshots.get(user_id, snapshots.CALCULATOR)
+    if row is None:
+        row = snapshots.save_calculator(user_id, compute(user_id))
+    return snapshots.calculator_summary(row)
+
+
+# ---------- Versioned cache ----------
+
+_signals = Namespace()
+# Sent on every cache lookup with sender=app and user_id, version, hit (bool).
+cache_lookup = _signals.signal('calculator-summary-cache-lookup')
+
+_cache = OrderedDict()     # (user_id, data_version) -> summary dict
+_stats = {'hits': 0, 'misses': 0}
+_lock = threading.Lock()
+
+
+def cached(user_id, version):
+    """load(user_id) through the (user_id, version) LRU; callers must not mutate the result."""
+    key = (user_id, version)
+    with _lock:
+        summary = _cache.get(key)
+        if summary is not None:
+            _cache.move_to_end(key)
+        _stats['hits' if summary is not None else 'misses'] += 1
+    cache_lookup.send(current_app._get_current_object(), user_id=user_id, version=version,
+                      hit=summary is not None)
+    if summary is not None:
+        return summary
+
+    summary = load(user_id)
+    with _lock:
+        _cache[key] = summary
+        while len(_cache) > current_app.config.get('SUMMARY_CACHE_SIZE', 1024):
+            _cache.popitem(last=False)
+    return summary
+
+
+def cache_stats():
+    with _lock:
+        return dict(_stats, size=len(_cache))
+
+
+def _differs(stored, fresh):
+    if isinstance(fresh, dict):
+        return not isinstance(stored, dict) or stored.keys() != fresh.keys() or \
+            any(_differs(stored[k], fresh[k]) for k in fresh)
+    if isinstance(fresh, list):
+        return not isinstance(stored, list) or len(stored) != len(fresh) or \
+            any(_differs(s, f) for s, f in zip(stored, fresh))
+    if isinstance(fresh, (int, float)) and isinstance(stored, (int, float)):
+        return not math.isclose(stored, fresh, rel_tol=1e-9, abs_tol=1e-6)
+    return stored != fresh
+
+
+def check(user_id):
+    """Fields whose stored value differs from a full recompute, or None when there is no stored row."""
+    row = snapshots.get(user_id, snapshots.CALCULATOR)
+    if row is None:
+        return None
+    stored, fresh = snapshots.calculator_summary(row), compute(user_id)
+    return sorted(key for key in fresh if _differs(stored.get(key), fresh[key]))
+
+
+@click.command('check-summaries')
+@click.option('--repair', is_flag=True, help='Rewrite summaries that drifted from the calculator tables.')
+@click.option('--user-id', type=int, multiple=True, help='Only check these users (repeatable).')
+@with_appcontext
+def check_summaries_command(repair, user_id):
+    """Recompute every stored calculator summary and report drift."""
+    user_ids = list(user_id) or db.session.execute(db.select(User.id).order_by(User.id)).scalars().all()
+    drifted = 0
+    for uid in user_ids:
+        fields = check(uid)
+        if not fields:
+            continue                   # in sync, or never rendered (built on first read)
+        drifted += 1
+        click.echo(f"user {uid}: {', '.join(fields)}")
+        if repair:
+            snapshots.write_calculator(uid, compute(uid))
+            data_version.bump(uid)         # retire cached copies of the drifted summary
+            db.session.commit()
+    action = 'repaired' if repair else 'drifted'
+    click.echo(f"Checked {len(user_ids)} user(s); {drifted} {action}.")
@@ -0,0 +1,28 @@
+from .models import db, User
+
+
+# Every write to a user's calculator data bumps User.data_version in the same
+# transaction, so anything derived from that data (exports, caches) can be
+# keyed by (user_id, version) and never needs explicit invalidation.
+
+def bump(user_id):
+    db.session.execute(
+        db.update(User).where(User.id == user_id).values(data_version=User.data_version + 1)
+    )
+
+
+def get(user_id):
+    return db.session.execute(
+        db.select(User.data_version).where(User.id == user_id)
+    ).scalar() or 0
+
+
+def bump_if(user_id, version):
+    """bump() only while the user is still at version; False when another write got there first."""
+    result = db.session.execute(
+        db.update(User)
+        .where(User.id == user_id, User.data_version == version)
+        .values(data_version=User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
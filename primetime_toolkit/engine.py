@@ -0,0 +1,139 @@
+import os
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+
+# Database engine settings, read from the environment so each deployment can
+# tune them without code changes:
+#
+#   DATABASE_URL                any SQLAlchemy URL (default sqlite:///primetime.db)
+#   DATABASE_READ_URL           a replica for the read-only views (default: a read-only
+#                               pool on the same SQLite file; none for other databases)
+#   SQLITE_JOURNAL_MODE         WAL lets readers run while one worker writes (default WAL)
+#   SQLITE_BUSY_TIMEOUT_MS      how long a writer waits for the lock before "database is locked" (default 5000)
+#   SQLITE_SYNCHRONOUS          NORMAL is safe under WAL and skips an fsync per commit (default NORMAL)
+#   SQLITE_MMAP_SIZE            bytes of the file read through mmap (default 256 MiB)
+#   DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+#                               connection pool for a server database (default 5, 10, 30 s, 1800 s)
+
+DEFAULT_DATABASE_URL = 'sqlite:///primetime.db'
+
+
+def database_url():
+    return os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+
+def sqlite_pragmas():
+    """PRAGMA name -> value run on every new SQLite connection, in order."""
+    return {
+        'foreign_keys': 'ON',
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for url. SQLite is tuned per connection instead (see configure)."""
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+
+def _sqlite_on_connect(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+
+def _read_engine(writer):
+    """Engine for the read-only views, or None to send them to the writer."""
+    url = os.environ.get('DATABASE_READ_URL')
+    if url:
+        engine = create_engine(url, **engine_options(url))
+    elif writer.dialect.name == 'sqlite' and writer.url.database not in (None, '', ':memory:'):
+        # mode=ro: a stray write from a read-only view fails instead of taking the write lock.
+        engine = create_engine(f'sqlite:///file:{writer.url.database}?mode=ro&uri=true')
+    else:
+        return None
+    if engine.dialect.name == 'sqlite':
+        pragmas = {name: value for name, value in sqlite_pragmas().items() if name != 'journal_mode'}
+        event.listen(engine, 'connect', _sqlite_on_connect(pragmas))
+    return engine
+
+
+def configure(app, db):
+    """Register the connect hooks on every engine db created for app, and set up read routing.
+
+    Call before any other before_request hook is registered.
+
+    SQLite leaves foreign keys (and with them ON DELETE CASCADE) switched off
+    unless each new connection turns them on, so the pragmas run per connection.
+    """
+    pragmas = sqlite_pragmas()
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_on_connect(pragmas))
+        app.extensions['read_engine'] = _read_engine(db.engine)
+    _route_reads(app)
+
+
+# ---------- Read/write routing ----------
+
+def read_only(view):
+    """Mark a view as read-only: its SELECTs go to the read engine (see RoutingSession)."""
+    view.read_only = True
+    return view
+
+
+def _route_reads(app):
+    # A before_request hook rather than a wrapper around the view, so the
+    # current_user load in the app's own before_request hooks is routed too.
+    def mark_request():
+        view = app.view_functions.get(request.endpoint)
+        g.db_read_only = getattr(view, 'read_only', False)
+    app.before_request(mark_request)
+
+
+class RoutingSession(Session):
+    """db.session for the app: reads in @read_only views use the read engine.
+
+    Only plain SELECTs are routed; flushes, INSERT/UPDATE/DELETE, raw SQL and
+    SELECT ... FOR UPDATE always go to the writer, so a read-only view that
+    lazily stores something (e.g. a first calculator snapshot) still works.
+    Once the transaction has sent the writer anything else, its SELECTs stay
+    on the writer until commit or rollback: the read engine cannot see
+    uncommitted writes.
+    """
+
+    _wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('db_read_only'):
+            if (self._flushing or not getattr(clause, 'is_select', False)
+                    or getattr(clause, '_for_update_arg', None) is not None):
+                self._wrote = True
+            elif not self._wrote:
+                engine = current_app.extensions.get('read_engine')
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _forget_writes(session, transaction):
+    if transaction.parent is None:
+        session._wrote = False
@@ -0,0 +1,108 @@
+import re
+import hashlib
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+
+# Content fingerprints for the worksheets of an xlsx, so a re-uploaded workbook
+# only has its edited sheets parsed again. A sheet's fingerprint hashes its
+# worksheet XML with every shared-string index replaced by a digest of the
+# string it points at: Excel renumbers the shared string table when text is
+# added to an earlier sheet, which must not make later, untouched sheets look
+# edited. The <sheetViews> block (selected tab, active cell) is dropped for the
+# same reason. styles.xml is folded into every fingerprint because number
+# formats decide whether a value is read as a date.
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CHUNK_SIZE = 1 << 20
+
+_SHARED_ITEM = re.compile(rb"<(?:\w+:)?si\b[^>]*?(?:/>|>(.*?)</(?:\w+:)?si>)", re.S)
+_SHARED_CELL = re.compile(rb"""(<(?:\w+:)?c\s[^>]*?\bt=["']s["'][^>]*>\s*<(?:\w+:)?v>)(\d+)(</(?:\w+:)?v>)""")
+_SHEET_VIEWS = re.compile(rb"<(?:\w+:)?sheetViews\b.*?</(?:\w+:)?sheetViews>", re.S)
+_CELL_END = (b"</v>", b":v>")
+
+
+def _sheet_parts(zf):
+    """[(sheet name, zip member of its worksheet XML)] in workbook order."""
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {}
+    for rel in rels.iter(f"{PKG_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        targets[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    return [
+        (sheet.get("name"), targets.get(sheet.get(f"{REL_NS}id")))
+        for sheet in workbook.iter(f"{MAIN_NS}sheet")
+    ]
+
+
+def _shared_strings(zf):
+    """Digest of every shared string, by index (None when the table is unreadable)."""
+    try:
+        data = zf.read("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    items = [hashlib.blake2b(m.group(1) or b"", digest_size=12).hexdigest().encode()
+             for m in _SHARED_ITEM.finditer(data)]
+    if len(items) != len(re.findall(rb"<(?:\w+:)?si\b", data)):
+        return None
+    return items
+
+
+def _normalise(xml, shared):
+    xml = _SHEET_VIEWS.sub(b"", xml)
+    if not shared:
+        return xml
+
+    def resolve(m):
+        index = int(m.group(2))
+        return m.group(1) + (shared[index] if index < len(shared) else m.group(2)) + m.group(3)
+    return _SHARED_CELL.sub(resolve, xml)
+
+
+def _hash_sheet(zf, part, common, shared):
+    h = hashlib.sha256(common)
+    pending = b""
+    with zf.open(part) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            pending += chunk
+            # Only hash up to the last complete cell value so no <c>..<v>n</v> is split.
+            cut = max(pending.rfind(end) + len(end) if end in pending else 0 for end in _CELL_END)
+            if cut:
+                h.update(_normalise(pending[:cut], shared))
+                pending = pending[cut:]
+    h.update(_normalise(pending, shared))
+    return h.hexdigest()
+
+
+def sheet_fingerprints(path):
+    """{sheet name: content fingerprint} for an xlsx; {} when it cannot be fingerprinted (e.g. .xls).
+
+    Sheets without a worksheet part (chart sheets) map to None.
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            parts = _sheet_parts(zf)
+            shared = _shared_strings(zf)
+            members = set(zf.namelist())
+            styles = zf.getinfo("xl/styles.xml").CRC if "xl/styles.xml" in members else 0
+
+            common = f"styles:{styles};".encode()
+            if shared is None:
+                # Unexpected table layout: fall back to treating any text edit as touching every sheet.
+                common += f"strings:{zf.getinfo('xl/sharedStrings.xml').CRC};".encode()
+            return {
+                name: _hash_sheet(zf, part, common, shared) if part in members else None
+                for name, part in parts
+            }
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        return {}
+
+
+def sheet_key(fingerprint, sections, parser_version):
+    """Cache key for the sections parser_version read from one sheet with the given fingerprint."""
+    return hashlib.sha256(f"{parser_version}:{fingerprint}:{','.join(sections)}".encode()).hexdigest()
@@ -1,58 +1,232 @@
+import zipfile
 import pandas as pd
 import numpy as np
 from collections import defaultdict
+from . import projection
+from .excel_fingerprint import sheet_fingerprints, sheet_key
+
+
+SHEET_KEYWORDS = {
+    "assets": ["asset"],
+    "liabilities": ["liab", "debt", "loan", "mortgage"],
+    "net_worth": ["summary", "overview", "net worth"],
+    "expenses": ["expense", "spending"],
+    "subscriptions": ["subs", "subscription", "services"],
+    "income": ["income", "salary", "earnings"],
+    "epic": ["epic", "one-off",],
+    "emergency": ["emergency"],
+    "super": ["super"],
+}
+
+
+# Sections parsed with extract_items_auto, in parse order.
+ITEM_SECTIONS = ["assets", "liabilities", "expenses", "subscriptions", "income", "epic"]
+
+# Every section extract_sections returns -> the SHEET_KEYWORDS key of the sheet it is read from.
+SECTION_SHEETS = {
+    **{key: key for key in ITEM_SECTIONS},
+    "explicit_assets_total": "assets",
+    "explicit_net_worth": "net_worth",
+    "emergency_fund": "emergency",
+    "super": "super",
+}
+
+# Above this much worksheet XML, parse_excel streams rows instead of building DataFrames.
+STREAMING_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+# Bump whenever parse_excel returns something different for the same workbook.
+# It is part of every parse cache key, whole-workbook and per-sheet, so results
+# from an older parser are parsed again instead of being served from the cache.
+PARSER_VERSION = 1
+
+
+def match_sheets(sheets):
+    """Map each SHEET_KEYWORDS key to the sheet it is read from (or None)."""
+    return {key: find_sheet(sheets, keywords) for key, keywords in SHEET_KEYWORDS.items()}
+
+
+def sheet_sections(names):
+    """Map each matched sheet to the sections extracted from it."""
+    roles = defaultdict(list)
+    for section, key in SECTION_SHEETS.items():
+        if names[key]:
+            roles[names[key]].append(section)
+    return roles
+
+
+def load_workbook(path, names=None, skip=()):
+    """Open the workbook once and read every sheet parse_excel needs (header=None).
+
+    Returns (sheet_names, names, frames): names maps a SHEET_KEYWORDS key to the
+    matched sheet (or None) and frames maps sheet name -> raw DataFrame. Sheets
+    in skip are not read.
+    """
+    with pd.ExcelFile(path) as xls:
+        sheets = xls.sheet_names
+        if names is None:
+            names = match_sheets(sheets)
+        wanted = list(dict.fromkeys(n for n in names.values() if n and n not in skip))
+        frames = xls.parse(sheet_name=wanted, header=None) if wanted else {}
+    return sheets, names, frames
+
+
+def frame_with_header(raw, header_row):
+    """Rebuild what pd.read_excel(..., header=header_row) would return from a raw frame."""
+    if header_row >= len(raw):
+        return pd.DataFrame()
+    names, seen = [], defaultdict(int)
+    for i, value in enumerate(raw.iloc[header_row]):
+        name = f"Unnamed: {i}" if pd.isna(value) else value
+        if seen[name]:
+            name = f"{name}.{seen[name]}"
+        seen[name] += 1
+        names.append(name)
+    df = raw.iloc[header_row + 1:].reset_index(drop=True).infer_objects()
+    df.columns = names
+    return df
+
+
+# Header detection: a table header has 2+ text cells, numbers within the next
+# HEADER_LOOKAHEAD rows under at least one of them, and ideally money/frequency
+# keywords. Every such keyword row starts a table, so stacked tables are found too.
+VALUE_KEYWORDS = ["$", "value", "amount", "balance", "cost"]
+HEADER_KEYWORDS = VALUE_KEYWORDS + ["freq"]
+HEADER_LOOKAHEAD = 3
+
+
+def pick_columns(cells, text, numbers_below):
+    """Choose (label_idx, value_idx, freq_idx) from a header row in one pass.
+
+    text[i] says whether cell i is text; numbers_below[i] whether numbers
+    appear under it. Returns None when no column can hold values.
+    """
+    headers = [str(c).strip().lower() if t else "" for c, t in zip(cells, text)]
+    value_cols = [i for i, h in enumerate(headers) if numbers_below[i] and any(k in h for k in VALUE_KEYWORDS)]
+    value_cols = value_cols or [i for i, h in enumerate(headers) if h and numbers_below[i]]
+    if not value_cols:
+        return None
+    value_idx = value_cols[0]
+
+    freq_idx = next((i for i, h in enumerate(headers) if "freq" in h and i != value_idx), None)
+    label_idx = next((i for i, h in enumerate(headers) if h and i not in (value_idx, freq_idx)), None)
+    if label_idx is None:
+        return None
+    return label_idx, value_idx, freq_idx
+
+
+def score_header(cells, rows_below):
+    """Scalar header score for one row: (score, keyword_hits, picked) or None.
+
+    rows_below are the next HEADER_LOOKAHEAD rows; excel_stream uses this while
+    streaming and header_rows below is its vectorised twin.
+    """
+    text = [isinstance(c, str) and c.strip() != "" for c in cells]
+    if sum(text) < 2:
+        return None
+    numbers_below = [
+        any(i < len(r) and not isinstance(r[i], str) and not pd.isna(r[i]) for r in rows_below)
+        for i in range(len(cells))
+    ]
+    numeric_below = sum(t and n for t, n in zip(text, numbers_below))
+    if numeric_below < 1:
+        return None
+    keyword_hits = sum(t and any(k in c.lower() for k in HEADER_KEYWORDS) for c, t in zip(cells, text))
+    picked = pick_columns(cells, text, numbers_below)
+    if picked is None:
+        return None
+    return sum(text) + 2 * numeric_below + 3 * keyword_hits, keyword_hits, picked
+
+
+def cell_kinds(raw):
+    """Boolean frames (text, numeric) for a raw header=None sheet."""
+    text, numeric = {}, {}
+    for col in raw.columns:
+        values = raw[col]
+        if values.dtype == object:
+            is_str = values.map(type).eq(str)
+            non_blank = values[is_str].str.strip().ne("").astype(bool)
+            text[col] = non_blank.reindex(raw.index, fill_value=False)
+            numeric[col] = values.notna() & ~is_str
+        else:
+            text[col] = pd.Series(False, index=raw.index)
+            numeric[col] = values.notna()
+    return pd.DataFrame(text), pd.DataFrame(numeric)
+
+
+def header_rows(raw):
+    """Score every row of a raw sheet at once and return [(row, picked columns)].
+
+    Rows with keywords each start a table; without any, the best-scoring
+    structural candidate is used.
+    """
+    if raw.empty or raw.shape[1] < 2:
+        return []
+    text, numeric = cell_kinds(raw)
+    below = numeric.shift(-1, fill_value=False)
+    for k in range(2, HEADER_LOOKAHEAD + 1):
+        below |= numeric.shift(-k, fill_value=False)
+
+    text_n = text.sum(axis=1)
+    numeric_below = (text & below).sum(axis=1)
+    structural = (text_n >= 2) & (numeric_below >= 1)
+
+    # Keywords only matter for the (few) structural rows.
+    candidates = raw[structural]
+    keyword_hits = pd.Series(0, index=raw.index)
+    keyword_hits[structural] = [
+        sum(t and any(k in str(c).lower() for k in HEADER_KEYWORDS) for c, t in zip(cells, flags))
+        for cells, flags in zip(candidates.itertuples(index=False), text[structural].itertuples(index=False))
+    ]
+    score = text_n + 2 * numeric_below + 3 * keyword_hits
 
-def extract_items_auto(path, sheet_name, max_header_check=5):
- 
-    for header_row in range(max_header_check):
-        try:
-            df = pd.read_excel(path, sheet_name=sheet_name, header=header_row)
-            if df.shape[1] < 2:
-                continue 
-            df = df.dropna(how="all")
-            cols = [str(c).strip() for c in df.columns]
+    def picked(row):
+        return pick_columns(raw.iloc[row].tolist(), text.iloc[row].tolist(), below.iloc[row].tolist())
 
-    
-            value_candidates = [c for c in cols if any(x in c.lower() for x in ["$", "value", "amount", "balance"])]
-            value_col = value_candidates[0] if value_candidates else cols[-1]
+    headers = [(row, picked(row)) for row in raw.index[structural & (keyword_hits >= 1)]]
+    headers = [(row, cols) for row, cols in headers if cols is not None]
+    if not headers:
+        ranked = score[structural].sort_values(ascending=False, kind="stable")
+        headers = next(([(row, picked(row))] for row in ranked.index if picked(row) is not None), [])
+    return headers
 
-            
-            label_candidates = [c for c in cols if c != value_col]
-            label_col = label_candidates[0] if label_candidates else cols[0]
 
-            freq_candidates = [c for c in cols if any(x in c.lower() for x in ["freq", "frequency"])]
-            freq_col = freq_candidates[0] if freq_candidates else None
+def extract_items_frame(frames, sheet_name):
+    """Return the sheet's line items as a DataFrame with label, value and frequency columns."""
+    raw = frames[sheet_name].reset_index(drop=True)
+    headers = header_rows(raw)
 
-            items, total = [], 0
-            for _, row in df.iterrows():
-                label = row[label_col]
-                value = row[value_col]
-                freq = row[freq_col] if freq_col else None
+    tables = []
+    for n, (header_row, (label_idx, value_idx, freq_idx)) in enumerate(headers):
+        end = headers[n + 1][0] if n + 1 < len(headers) else len(raw)
+        block = raw.iloc[header_row + 1:end]
 
+        labels = block.iloc[:, label_idx]
+        values = pd.to_numeric(block.iloc[:, value_idx], errors="coerce")
+        label_str = labels.astype(str).str.strip()
+        keep = labels.notna() & values.notna() & ~label_str.str.lower().str.startswith("total")
 
-                if pd.isna(label) or pd.isna(value):
-                    continue
+        header = raw.iloc[header_row]
+        print(f"{sheet_name}: header_row={header_row}, label_col='{header.iloc[label_idx]}', value_col='{header.iloc[value_idx]}'")
+        tables.append(pd.DataFrame({
+            "label": label_str[keep],
+            "value": values[keep].astype(float),
+            "frequency": block.iloc[:, freq_idx][keep] if freq_idx is not None else None,
+        }))
 
-                label_str = str(label).strip()
-                if label_str.lower().startswith("total"):
-                    continue 
-                try:
-                    value = float(value)
-                except (ValueError, TypeError):
-                    continue
+    items = [t for t in tables if not t.empty]
+    if not items:
+        print(f"⚠️ Could not parse {sheet_name}")
+        return pd.DataFrame(columns=["label", "value", "frequency"])
+    return pd.concat(items, ignore_index=True)
 
-                items.append({"label": label_str, "value": value, "frequency": freq})
-                total += value
 
-            if items:
-                print(f"{sheet_name}: header_row={header_row}, label_col='{label_col}', value_col='{value_col}'")
-                return items, total
+def items_from_frame(items_df):
+    items = items_df.to_dict("records")
+    return items, sum(items_df["value"].tolist())
 
-        except Exception as e:
-            continue
 
-    print(f"⚠️ Could not parse {sheet_name}")
-    return [], 0
+def extract_items_auto(frames, sheet_name):
+    return items_from_frame(extract_items_frame(frames, sheet_name))
 
 
 def find_sheet(sheets, keywords):
@@ -66,8 +240,8 @@ def find_sheet(sheets, keywords):
     return None
 
 
-def extract_total_assets(path, sheet_name):
-    df = pd.read_excel(path, sheet_name=sheet_name)
+def extract_total_assets(frames, sheet_name):
+    df = frames[sheet_name].iloc[1:]
     for _, row in df.iterrows():
         label = str(row[0]).strip().lower()
         if "total assets" in label or "assets total" in label:
@@ -78,8 +252,8 @@ def extract_total_assets(path, sheet_name):
     return None
 
 
-def extract_net_worth(path, sheet_name):
-    df = pd.read_excel(path, sheet_name=sheet_name)
+def extract_net_worth(frames, sheet_name):
+    df = frames[sheet_name].iloc[1:]
     for _, row in df.iterrows():
         label = str(row[0]).strip().lower()
         if "net worth" in label:
@@ -90,59 +264,151 @@ def extract_net_worth(path, sheet_name):
     return None
 
 
-def parse_excel(path):
-    sheets = pd.ExcelFile(path).sheet_names
-    print(f"\nParsing Excel file: {path}")
+def group_frame(items_df):
+    """Sum item values per title-cased label, in order of first appearance."""
+    keys = items_df["label"].where(items_df["label"] != "", "Other").str.title()
+    grouped = items_df["value"].groupby(keys, sort=False).sum()
+    return defaultdict(float, grouped.to_dict())
+
+
+def worksheet_xml_size(path):
+    """Uncompressed size of the worksheet parts inside an xlsx (0 for legacy .xls)."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return sum(i.file_size for i in zf.infolist() if i.filename.startswith("xl/worksheets/"))
+    except zipfile.BadZipFile:
+        return 0
+
+
+def empty_sections(names):
+    """Sections for keys whose sheet is missing from the workbook."""
+    sections = {}
+    for section, key in SECTION_SHEETS.items():
+        if not names[key]:
+            sections[section] = ([], 0, defaultdict(float)) if section in ITEM_SECTIONS else None
+    return sections
+
+
+def extract_sections(path, names=None, skip=()):
+    """Pull every section parse_excel needs out of the workbook via pandas.
+
+    Sections read from a sheet in skip are left out of the result.
+    """
+    sheets, names, frames = load_workbook(path, names, skip)
     print(f"Sheets found: {sheets}\n")
 
+    sections = empty_sections(names)
+    for key in ITEM_SECTIONS:
+        if names[key] in frames:
+            items_df = extract_items_frame(frames, names[key])
+            sections[key] = items_from_frame(items_df) + (group_frame(items_df),)
+
+    assets_name, nw_sheet = names["assets"], names["net_worth"]
+    if assets_name in frames:
+        sections["explicit_assets_total"] = extract_total_assets(frames, assets_name)
+    if nw_sheet in frames:
+        sections["explicit_net_worth"] = extract_net_worth(frames, nw_sheet)
+
+    # --- Emergency Fund ---
+    ef_name = names["emergency"]
+    if ef_name in frames:
+        sections["emergency_fund"] = None
+        df = frame_with_header(frames[ef_name], 0)
+        try:
+            sections["emergency_fund"] = (float(df.iloc[0, 1]), float(df.iloc[1, 1]))
+        except Exception:
+            print("Could not parse Emergency Fund sheet")
+
+    # --- Superannuation Growth ---
+    super_name = names["super"]
+    if super_name in frames:
+        df = frame_with_header(frames[super_name], 0)
+        sections["super"] = (list(df.iloc[:, 0].dropna()), list(df.iloc[:, 1].dropna()))
+
+    return sections
+
+
+def _sheet_keys(fingerprints):
+    names = match_sheets(list(fingerprints))
+    roles = sheet_sections(names)
+    keys = {sheet: sheet_key(fingerprints[sheet], sections, PARSER_VERSION)
+            for sheet, sections in roles.items() if fingerprints.get(sheet)}
+    return names, roles, keys
+
+
+def sheet_keys(path):
+    """The sheet_cache keys incremental_sections reads and writes for the workbook at path."""
+    fingerprints = sheet_fingerprints(path)
+    return list(_sheet_keys(fingerprints)[2].values()) if fingerprints else []
+
+
+def incremental_sections(path, extract, sheet_cache):
+    """Run extract only on sheets whose content changed since they were last parsed.
+
+    sheet_cache maps a sheet key (see excel_fingerprint) to the sections read
+    from that sheet; hits are reused and fresh results are written back.
+    """
+    fingerprints = sheet_fingerprints(path)
+    if not fingerprints:
+        return extract(path)
+
+    names, roles, keys = _sheet_keys(fingerprints)
+    cached = {sheet: sheet_cache.get(key) for sheet, key in keys.items()}
+    reused = {sheet for sheet, hit in cached.items() if hit is not None}
+
+    sections = extract(path, names=names, skip=reused)
+    for sheet in reused:
+        print(f"{sheet}: unchanged, reusing cached results")
+        sections.update(cached[sheet])
+    for sheet, key in keys.items():
+        if sheet not in reused:
+            sheet_cache[key] = {section: sections[section] for section in roles[sheet]}
+    return sections
+
+
+def parse_excel(path, streaming=None, sheet_cache=None):
+    """Parse an uploaded toolkit workbook into the dashboard dict.
+
+    Workbooks whose worksheet XML exceeds STREAMING_THRESHOLD_BYTES are read
+    row by row (see excel_stream) instead of being loaded into DataFrames;
+    pass streaming=True/False to force either path. With a sheet_cache (see
+    parse_cache.SheetCache) only sheets that changed since a previous parse
+    are read again.
+    """
+    print(f"\nParsing Excel file: {path}")
+    if streaming is None:
+        streaming = worksheet_xml_size(path) > STREAMING_THRESHOLD_BYTES
+    if streaming:
+        from .excel_stream import stream_sections as extract
+    else:
+        extract = extract_sections
+    if sheet_cache is None:
+        sections = extract(path)
+    else:
+        sections = incremental_sections(path, extract, sheet_cache)
+    return build_result(sections)
+
+
+def build_result(sections):
     # --- Assets ---
-    assets_name = find_sheet(sheets, ["asset"])
-    explicit_assets_total = extract_total_assets(path, assets_name) if assets_name else None
-    assets_items, calculated_assets_total = extract_items_auto(path, assets_name) if assets_name else ([], 0)
+    assets_items, calculated_assets_total, _ = sections["assets"]
+    explicit_assets_total = sections["explicit_assets_total"]
     assets_total = explicit_assets_total if explicit_assets_total is not None else calculated_assets_total
 
     # --- Liabilities ---
-    liab_name = find_sheet(sheets, ["liab", "debt", "loan", "mortgage"])
-    liab_items, liab_total = extract_items_auto(path, liab_name) if liab_name else ([], 0)
+    liab_items, liab_total, _ = sections["liabilities"]
 
     # --- Net Worth (explicit override if available) ---
-    nw_sheet = find_sheet(sheets, ["summary", "overview", "net worth"])
-    explicit_net_worth = extract_net_worth(path, nw_sheet) if nw_sheet else None
+    explicit_net_worth = sections["explicit_net_worth"]
     net_worth = explicit_net_worth if explicit_net_worth is not None else assets_total - liab_total
 
     print(f"Net Worth = {net_worth}\n")
 
-    frequency_map = defaultdict(lambda: 12, {
-        "weekly": 52,
-        "fortnightly": 26,
-        "monthly": 12,
-        "quarterly": 4,
-        "annually": 1,
-        "yearly": 1,
-        "daily": 365,
-    })
-
     # --- Expenses ---
-    exp_name = find_sheet(sheets, ["expense", "spending"])
-    exp_items, exp_total = extract_items_auto(path, exp_name) if exp_name else ([], 0)
-
-    expense_buckets_sum = defaultdict(float)
-    for item in exp_items:
-        label = (item.get("label") or "Other").strip().title()
-        value = float(item.get("value") or 0.0)
-        expense_buckets_sum[label] += value
+    exp_items, exp_total, expense_buckets_sum = sections["expenses"]
 
-    
     # --- Subscriptions ---
-    subs_name = find_sheet(sheets, ["subs", "subscription", "services"])
-    subs_items, subs_total = extract_items_auto(path, subs_name) if subs_name else ([], 0)
-
-    grouped_subs = defaultdict(float)
-    for item in subs_items:
-        label = (item.get("label") or "Other").strip().title()
-        value = float(item.get("value") or 0.0)
-        grouped_subs[label] += value
-    
+    subs_items, subs_total, grouped_subs = sections["subscriptions"]
     subs_breakdown = [
         {"label": lbl, "value": round(val, 2)} for lbl, val in grouped_subs.items()
     ]
@@ -152,18 +418,11 @@ def parse_excel(path):
     exp_items.extend(subs_items)
 
     # --- Income ---
-    inc_name = find_sheet(sheets, ["income", "salary", "earnings"])
-    inc_items, inc_total = extract_items_auto(path, inc_name) if inc_name else ([], 0)
+    inc_items, inc_total, grouped_incomes = sections["income"]
     if inc_total == 0:
         inc_total = 5000
         print("No income found, using fallback=5000")
 
-    grouped_incomes = defaultdict(float)
-    for item in inc_items:
-        label = (item.get("label") or "Other").strip().title()
-        value = float(item.get("value") or 0.0)
-        grouped_incomes[label] += value
-    
     income_breakdown = [
         {"label": lbl, "value": round(val, 2)} for lbl, val in grouped_incomes.items()
     ]
@@ -172,50 +431,31 @@ def parse_excel(path):
     print(f"Monthly Savings = {monthly_savings}\n")
 
     #----Epic & One Off-----
-    epic_name = find_sheet(sheets, ["epic", "one-off",])
     epic_years = 10
-    epic_items, epic_total = extract_items_auto(path, epic_name) if epic_name else ([], 0)
+    epic_items, epic_total, _ = sections["epic"]
 
-    
     # --- Emergency Fund ---
-    ef_name = find_sheet(sheets, ["emergency"])
     ef_goal, ef_current = 0, 0
-    if ef_name:
-        df = pd.read_excel(path, sheet_name=ef_name)
-        try:
-            ef_goal = float(df.iloc[0, 1])
-            ef_current = float(df.iloc[1, 1])
-            print(f"Emergency Fund: goal={ef_goal}, current={ef_current}")
-        except Exception:
-            print("Could not parse Emergency Fund sheet")
+    if sections["emergency_fund"] is not None:
+        ef_goal, ef_current = sections["emergency_fund"]
+        print(f"Emergency Fund: goal={ef_goal}, current={ef_current}")
 
     # --- Superannuation Growth ---
-    super_name = find_sheet(sheets, ["super"])
-    if super_name:
-        df = pd.read_excel(path, sheet_name=super_name)
-        super_years = list(df.iloc[:, 0].dropna())
-        super_values = list(df.iloc[:, 1].dropna())
+    if sections["super"] is not None:
+        super_years, super_values = sections["super"]
     else:
         super_years = list(range(2025, 2035))
         super_values = [10000 * (1.05**i) for i in range(len(super_years))]
     print(f"Superannuation Growth: {len(super_years)} years\n")
 
     # --- Savings Over Time ---
-    months = list(range(0, 12 * 10 + 1))
-    rate_monthly = 0.03 / 12
-    balance, savings_values = 0, []
-    for m in months:
-        if m > 0:
-            balance = balance * (1 + rate_monthly) + monthly_savings
-        savings_values.append(round(balance, 2))
+    months = projection.months().tolist()
+    savings_values = projection.as_list(projection.savings_series(monthly_savings))
 
     # --- Drawdown Over Time ---
     drawdown_months = months
     retirement_balance = super_values[-1] if super_values else 200000
-    withdrawal, bal, drawdown_values = 3000, retirement_balance, []
-    for _ in drawdown_months:
-        bal = bal * (1 + rate_monthly) - withdrawal
-        drawdown_values.append(max(0, round(bal, 2)))
+    drawdown_values = projection.as_list(projection.drawdown_series(retirement_balance))
 
     print("Finished parsing Excel\n")
 
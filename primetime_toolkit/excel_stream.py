@@ -0,0 +1,255 @@
+import math
+from collections import defaultdict, deque
+from openpyxl import load_workbook as open_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas._libs.parsers import STR_NA_VALUES
+from .excel_parser import (
+    HEADER_LOOKAHEAD, ITEM_SECTIONS, SECTION_SHEETS, empty_sections, match_sheets, score_header
+)
+
+
+# Row-by-row counterpart of excel_parser.extract_sections for very large workbooks.
+# Sheets are read in openpyxl read-only mode and every row is handed to small
+# accumulators, so no sheet is ever materialised as a DataFrame.
+
+NAN = float("nan")
+
+
+def _cell(value):
+    """Normalise a cell the way pandas' openpyxl reader does."""
+    if value is None:
+        return NAN
+    if isinstance(value, str):
+        return NAN if value in STR_NA_VALUES or value in ERROR_CODES else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _isna(value):
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _get(row, index):
+    return row[index] if index < len(row) else NAN
+
+
+def iter_sheet_rows(ws):
+    """Yield each row as a list of normalised cells with trailing blanks trimmed."""
+    for values in ws.iter_rows(values_only=True):
+        row = [_cell(v) for v in values]
+        while row and _isna(row[-1]):
+            row.pop()
+        yield row
+
+
+def group_items(items):
+    """Streaming group_frame: Kahan sums per title-cased label, like pandas' groupby sum."""
+    groups, compensation = defaultdict(float), defaultdict(float)
+    for item in items:
+        key = (item["label"] or "Other").strip().title()
+        y = item["value"] - compensation[key]
+        t = groups[key] + y
+        compensation[key] = t - groups[key] - y
+        groups[key] = t
+    return groups
+
+
+class ItemAccumulator:
+    """Line items of one table on a sheet."""
+
+    def __init__(self, header_row, label_idx, value_idx, freq_idx):
+        self.header_row = header_row
+        self.columns = (label_idx, value_idx, freq_idx)
+        self.items = []
+
+    def add(self, row):
+        label_idx, value_idx, freq_idx = self.columns
+        label, value = _get(row, label_idx), _get(row, value_idx)
+        if _isna(label) or _isna(value):
+            return
+
+        label_str = str(label).strip()
+        if label_str.lower().startswith("total"):
+            return
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return
+
+        freq = _get(row, freq_idx) if freq_idx is not None else None
+        self.items.append({"label": label_str, "value": value, "frequency": freq})
+
+
+class ItemStream:
+    """Streaming extract_items_frame: rows are scored as headers once HEADER_LOOKAHEAD rows follow them."""
+
+    def __init__(self, sheet_name):
+        self.sheet_name = sheet_name
+        self.window = deque()      # rows still waiting for their lookahead
+        self.tables = []           # one accumulator per keyword header
+        self.fallback = None       # best keyword-less header, used only if no table is found
+        self.fallback_score = None
+        self.labels = {}
+        self.done = False
+
+    def feed(self, index, row):
+        self.window.append((index, row))
+        if len(self.window) > HEADER_LOOKAHEAD:
+            self._score_next()
+
+    def _score_next(self):
+        index, row = self.window.popleft()
+        scored = score_header(row, [r for _, r in self.window])
+        if scored is not None:
+            score, keyword_hits, columns = scored
+            if keyword_hits:
+                self.tables.append(ItemAccumulator(index, *columns))
+                self.labels[index] = (row[columns[0]], row[columns[1]])
+                return
+            if not self.tables and (self.fallback is None or score > self.fallback_score):
+                self.fallback, self.fallback_score = ItemAccumulator(index, *columns), score
+                self.labels[index] = (row[columns[0]], row[columns[1]])
+                return
+
+        if self.tables:
+            self.tables[-1].add(row)
+        elif self.fallback is not None:
+            self.fallback.add(row)
+
+    def result(self):
+        while self.window:
+            self._score_next()
+
+        tables = self.tables or ([self.fallback] if self.fallback is not None else [])
+        items = []
+        for table in tables:
+            label_col, value_col = self.labels[table.header_row]
+            print(f"{self.sheet_name}: header_row={table.header_row}, label_col='{label_col}', value_col='{value_col}'")
+            items.extend(table.items)
+
+        if not items:
+            print(f"⚠️ Could not parse {self.sheet_name}")
+        return items, sum(item["value"] for item in items), group_items(items)
+
+
+class LabelValueScan:
+    """Streaming extract_total_assets / extract_net_worth."""
+
+    def __init__(self, phrases):
+        self.phrases = phrases
+        self.value = None
+        self.done = False
+
+    def feed(self, index, row):
+        if index == 0:
+            return
+        label = str(_get(row, 0)).strip().lower()
+        if any(p in label for p in self.phrases):
+            try:
+                self.value = float(_get(row, 1))
+                self.done = True
+            except (ValueError, TypeError):
+                pass
+
+    def result(self):
+        return self.value
+
+
+class EmergencyFundScan:
+    """Goal and current balance from column B of the first two data rows."""
+
+    def __init__(self):
+        self.values = []
+        self.done = False
+
+    def feed(self, index, row):
+        if index in (1, 2):
+            self.values.append(_get(row, 1))
+        self.done = index >= 2
+
+    def result(self):
+        try:
+            goal, current = self.values
+            return float(goal), float(current)
+        except (ValueError, TypeError):
+            print("Could not parse Emergency Fund sheet")
+            return None
+
+
+def _infer_column(values):
+    """Mirror pandas' dtype inference: all-numeric columns with gaps become floats."""
+    present = [v for v in values if not _isna(v)]
+    numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present)
+    if present and numeric and (len(present) < len(values) or any(isinstance(v, float) for v in present)):
+        return [float(v) for v in values], True
+    return values, present and numeric
+
+
+class SuperScan:
+    """Years and balances from the first two columns of the super sheet."""
+
+    def __init__(self):
+        self.columns = ([], [])
+        self.done = False
+
+    def feed(self, index, row):
+        for i, column in enumerate(self.columns):
+            column.append(_get(row, i))
+
+    def result(self):
+        out = []
+        for column in self.columns:
+            full, numeric = _infer_column(column)
+            data = full[1:] if numeric else _infer_column(column[1:])[0]
+            out.append([v for v in data if not _isna(v)])
+        return tuple(out)
+
+
+def _stream_sheet(ws, consumers):
+    for index, row in enumerate(iter_sheet_rows(ws)):
+        for consumer in consumers:
+            if not consumer.done:
+                consumer.feed(index, row)
+        if all(consumer.done for consumer in consumers):
+            break
+
+
+def stream_sections(path, names=None, skip=()):
+    """extract_sections for huge workbooks: one read-only pass per needed sheet."""
+    wb = open_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheets = wb.sheetnames
+        if names is None:
+            names = match_sheets(sheets)
+        print(f"Sheets found: {sheets}\n")
+
+        consumers = {}
+        if names["assets"]:
+            consumers["explicit_assets_total"] = LabelValueScan(("total assets", "assets total"))
+        if names["net_worth"]:
+            consumers["explicit_net_worth"] = LabelValueScan(("net worth",))
+        if names["emergency"]:
+            consumers["emergency_fund"] = EmergencyFundScan()
+        if names["super"]:
+            consumers["super"] = SuperScan()
+        for key in ITEM_SECTIONS:
+            if names[key]:
+                consumers[key] = ItemStream(names[key])
+
+        by_sheet = defaultdict(list)
+        for key in list(consumers):
+            sheet = names[SECTION_SHEETS[key]]
+            if sheet in skip:
+                del consumers[key]
+            else:
+                by_sheet[sheet].append(consumers[key])
+
+        for name, group in by_sheet.items():
+            _stream_sheet(wb[name], group)
+    finally:
+        wb.close()
+
+    sections = empty_sections(names)
+    sections.update((key, consumer.result()) for key, consumer in consumers.items())
+    return sections
@@ -0,0 +1,154 @@
+import os
+import tempfile
+from flask import current_app
+from openpyxl import Workbook
+from . import data_version
+from .models import (
+    db, LifeExpectancy, Asset, Liability, Income, Expense, Subscription, FutureBudget,
+    EpicExperience, IncomeLayer, SpendingAllocation, DebtPaydown, EnoughCalculator
+)
+
+
+# Writes a user's web-calculator data back into the toolkit workbook layout
+# (intro text on row 2, headers on row 4, one line item per row below), so the
+# file can be re-uploaded on the spreadsheet dashboard. Rows are fetched in
+# batches and written with openpyxl's write-only writer; finished files are
+# cached per (user, data_version).
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+FETCH_BATCH = 500
+CHUNK_SIZE = 64 * 1024
+
+# (sheet title, intro, model, [(header, column)])
+SHEETS = [
+    ('2. Life Expectancy', 'Your saved life expectancy estimates.', LifeExpectancy, [
+        ('Gender', 'gender'), ('Percentile', 'percentile'), ('Current age', 'current_age'),
+        ('Expected lifespan', 'expected_lifespan'), ('Years remaining', 'years_remaining'),
+        ('Estimated year of death', 'estimated_year_of_death'),
+    ]),
+    ('3. Assets', 'Your assets and whether each is included in your net worth.', Asset, [
+        ('Category', 'category'), ('Description', 'description'), ('Current value ($)', 'amount'),
+        ('Owner', 'owner'), ('Include in totals?', 'include'),
+    ]),
+    ('4. Liabilities & Savings', 'Your debts and savings commitments.', Liability, [
+        ('Category', 'category'), ('Name', 'name'), ('Outstanding balance ($)', 'amount'),
+        ('Type', 'type'), ('Monthly repayment ($)', 'monthly'), ('Notes', 'notes'),
+    ]),
+    ('5. Current Income', 'Your take-home income and how often it is paid.', Income, [
+        ('Income source', 'source'), ('Amount per period ($)', 'amount'), ('Frequency', 'frequency'),
+        ('Notes', 'notes'), ('Include in totals?', 'include'),
+    ]),
+    ('6. Current Expenses', 'Your spending by category and frequency.', Expense, [
+        ('Category', 'category'), ('Item', 'item'), ('Amount per period ($)', 'amount'),
+        ('Frequency', 'frequency'), ('Type', 'type'),
+    ]),
+    ('7. Subscriptions', 'Your recurring services and direct debits.', Subscription, [
+        ('Subscription/Service', 'name'), ('Provider', 'provider'), ('Cost per period ($)', 'amount'),
+        ('Frequency', 'frequency'), ('Annual cost ($)', 'annual_amount'), ('Include?', 'include'),
+        ('Notes', 'notes'),
+    ]),
+    ('8. Future Budget', 'Your budget for each phase of life.', FutureBudget, [
+        ('Phase', 'phase'), ('Age range', 'age_range'), ('Years in phase', 'years_in_phase'),
+        ('Baseline cost ($)', 'baseline_cost'), ('One-off costs per annum ($)', 'oneoff_costs'),
+        ('Epic experiences per annum ($)', 'epic_experiences'), ('Total annual budget ($)', 'total_annual_budget'),
+    ]),
+    ('9. Epic & One-off', 'Your epic experiences and one-off costs.', EpicExperience, [
+        ('Item', 'item'), ('Estimated cost ($)', 'amount'), ('Frequency', 'frequency'), ('Include?', 'include'),
+    ]),
+    ('10. Income Layers', 'Your layers of income and when each applies.', IncomeLayer, [
+        ('Income layer', 'layer'), ('Description', 'description'), ('Start age', 'start_age'),
+        ('End age', 'end_age'), ('Estimated annual amount ($)', 'annual_amount'),
+    ]),
+    ('11. Spending Allocation', 'Your spending allocation for each phase.', SpendingAllocation, [
+        ('Phase', 'phase'), ('Cost of living baseline', 'cost_base'), ('Lifestyle discretionary', 'cost_life'),
+        ('Saving & investing', 'cost_save'), ('Health & care', 'cost_health'), ('Other', 'cost_other'),
+    ]),
+    ('14. Debt Paydown', 'Your debts and repayment plans.', DebtPaydown, [
+        ('Debt name', 'name'), ('Principal ($)', 'principal'), ('Annual interest rate (%)', 'annual_interest_rate'),
+        ('Monthly payment ($)', 'monthly_payment'), ('Years to repay', 'years_to_repay'), ('Include?', 'include'),
+    ]),
+    ('15. Enough Calculator', 'Your Enough calculator inputs and results.', EnoughCalculator, [
+        ('Use future budget?', 'use_future_budget'), ('Manual annual amount ($)', 'manual_annual'),
+        ('Real return rate (%)', 'real_rate'), ('Years', 'years'), ('Pension ($ per year)', 'pension'),
+        ('Part-time income ($ per year)', 'part_time_income'), ('Part-time years', 'part_time_years'),
+        ('Shortfall ($)', 'shortfall'), ('Lump sum - rule ($)', 'lump_sum_rule'),
+        ('Lump sum - annuity ($)', 'lump_sum_annuity'),
+    ]),
+]
+
+
+def _cell(value):
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    return value
+
+
+def _rows(model, columns, user_id):
+    stmt = (
+        db.select(*[getattr(model, c) for _, c in columns])
+        .where(model.user_id == user_id)
+        .order_by(model.id)
+        .execution_options(yield_per=FETCH_BATCH)
+    )
+    for row in db.session.execute(stmt):
+        yield [_cell(v) for v in row]
+
+
+def write_workbook(user_id, path):
+    """Write user_id's calculator data to path without holding the sheets in memory."""
+    wb = Workbook(write_only=True)
+    for title, intro, model, columns in SHEETS:
+        ws = wb.create_sheet(title)
+        ws.append([])
+        ws.append([intro])
+        ws.append([])
+        ws.append([header for header, _ in columns])
+        for row in _rows(model, columns, user_id):
+            ws.append(row)
+    wb.save(path)
+
+
+def _user_folder(user_id):
+    folder = os.path.join(current_app.config['EXPORT_FOLDER'], str(int(user_id)))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def export_path(user_id):
+    """Path of an up-to-date export for user_id, building it if this data version has none."""
+    version = data_version.get(user_id)
+    folder = _user_folder(user_id)
+    path = os.path.join(folder, f"{version}.xlsx")
+    if os.path.exists(path):
+        return path, version
+
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    os.close(fd)
+    try:
+        write_workbook(user_id, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Older versions can never be served again, but a request that resolved the
+    # previous version just before this one was built may still be opening it.
+    older = sorted((int(name[:-len('.xlsx')]) for name in os.listdir(folder)
+                    if name.endswith('.xlsx') and name[:-len('.xlsx')].isdigit()), reverse=True)
+    for old in [v for v in older if v < version][1:]:
+        try:
+            os.remove(os.path.join(folder, f"{old}.xlsx"))
+        except FileNotFoundError:
+            pass                    # pruned by a concurrent export
+    return path, version
+
+
+def iter_file(path, chunk_size=CHUNK_SIZE):
+    """Chunks of path; the file is opened now, so a concurrent cleanup cannot pull it away."""
+    f = open(path, 'rb')
+
+    def chunks():
+        with f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+    return chunks()
@@ -4,10 +4,16 @@ from flask_mail import Mail
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_migrate import Migrate
+from sqlalchemy import MetaData
+from .engine import RoutingSession
 
 
 migrate = Migrate()
 limiter = Limiter(key_func=get_remote_address)
-db = SQLAlchemy()
+# Named foreign keys, so migrations can drop and recreate them on SQLite too.
+db = SQLAlchemy(metadata=MetaData(naming_convention={
+    "ix": "ix_%(column_0_label)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}), session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 mail = Mail()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import enum
+
+
+# Normalised payment frequency. Rows store it (and their annualised amount)
+# when they are written, so summaries can SUM a column instead of matching
+# frequency strings with ILIKE on every read.
+
+class Period(enum.Enum):
+    WEEKLY = 'weekly'
+    FORTNIGHTLY = 'fortnightly'
+    MONTHLY = 'monthly'
+    QUARTERLY = 'quarterly'
+    ANNUALLY = 'annually'
+    ONCE = 'once only'
+    OTHER = 'other'
+
+
+PER_YEAR = {
+    Period.WEEKLY: 52,
+    Period.FORTNIGHTLY: 26,
+    Period.MONTHLY: 12,
+    Period.QUARTERLY: 4,
+    Period.ANNUALLY: 1,
+}
+EPIC_YEARS = 10     # one-off epic experiences are spread over this many years
+
+
+def period(frequency):
+    """Period for a free-text frequency ('Monthly', 'once only', ...), case-insensitively."""
+    try:
+        return Period(str(frequency).lower()) if frequency is not None else Period.OTHER
+    except ValueError:
+        return Period.OTHER
+
+
+def recurring_annual(amount, frequency):
+    """Income, expenses and subscriptions: unknown frequencies count as monthly."""
+    return float(amount or 0.0) * PER_YEAR.get(period(frequency), 12)
+
+
+def epic_annual(amount, frequency):
+    """Epic experiences: one-offs are spread over EPIC_YEARS, unknown frequencies count as 0."""
+    p = period(frequency)
+    if p is Period.ONCE:
+        return float(amount or 0.0) / EPIC_YEARS
+    return float(amount or 0.0) * PER_YEAR.get(p, 0)
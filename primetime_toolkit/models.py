@@ -1,12 +1,16 @@
 from . import db
+from .frequency import Period, period as period_of, recurring_annual, epic_annual
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 from flask_login import UserMixin
 
 
 class Assessment(db.Model):
+    __table_args__ = (db.Index('ix_assessment_user_id_submitted_at', 'user_id', 'submitted_at'),)
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Purpose & direction
@@ -61,6 +65,9 @@ class Assessment(db.Model):
 
 
 
+# Every per-user table references user.id with ON DELETE CASCADE, so deleting
+# the user row erases all of that user's data (see accounts.erase).
+
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(150), nullable=False)
@@ -68,6 +75,7 @@ class User(db.Model, UserMixin):
     pword = db.Column(db.String(200), nullable=False)
     two_factor_secret = db.Column(db.String(16), nullable=True)
     is_2fa_enabled = db.Column(db.Boolean, default=False)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')   # bumped on every calculator save
 
     def __init__(self, name, email, pword):
         self.name = name
@@ -85,7 +93,7 @@ class Subscriber(db.Model):
 
 class LifeExpectancy(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     gender = db.Column(db.String(16), nullable=False)
     percentile = db.Column(db.String(32), nullable=False)
     current_age = db.Column(db.Integer, nullable=False)
@@ -96,9 +104,14 @@ class LifeExpectancy(db.Model):
 
 
 
+# Every calculator read filters on user_id (and usually include), so each table
+# is indexed on it; the composite indexes also cover the columns the summary SUMs.
+
 class Asset(db.Model):
+    __table_args__ = (db.Index('ix_asset_user_id_include_amount', 'user_id', 'include', 'amount'),)
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     category = db.Column(db.String(64))
     description = db.Column(db.String(128))
     amount = db.Column(db.Float)
@@ -108,8 +121,10 @@ class Asset(db.Model):
 
 
 class Liability(db.Model):
+    __table_args__ = (db.Index('ix_liability_user_id_amount', 'user_id', 'amount'),)
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     category = db.Column(db.String(64))
     name = db.Column(db.String(128))
     amount = db.Column(db.Float)
@@ -119,32 +134,42 @@ class Liability(db.Model):
 
 
 class Income(db.Model):
+    __table_args__ = (db.Index('ix_income_user_id_include_source_annual_amount',
+                               'user_id', 'include', 'source', 'annual_amount'),)
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     source = db.Column(db.String(128))
     amount = db.Column(db.Float)
     frequency = db.Column(db.String(32))
     notes = db.Column(db.String(128))
     include = db.Column(db.Boolean, default=True)
+    period = db.Column(db.Enum(Period, native_enum=False, length=16))
+    annual_amount = db.Column(db.Float)
 
 
 class Expense(db.Model):
+    __table_args__ = (db.Index('ix_expense_user_id_annual_amount', 'user_id', 'annual_amount'),)
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     category = db.Column(db.String(64))
     item = db.Column(db.String(128))
     amount = db.Column(db.Float)
     frequency = db.Column(db.String(32))
     type = db.Column(db.String(32))
     timestamp = db.Column(db.DateTime, server_default=db.func.now())
+    period = db.Column(db.Enum(Period, native_enum=False, length=16))
+    annual_amount = db.Column(db.Float)
 
 
 
 class Subscription(db.Model):
     __tablename__ = 'subscriptions'
+    __table_args__ = (db.Index('ix_subscriptions_user_id_include_annual_amount', 'user_id', 'include', 'annual_amount'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     name = db.Column(db.String(120), nullable=False)    
     provider = db.Column(db.String(120))
     amount = db.Column(db.Float, default=0.0)          
@@ -153,13 +178,14 @@ class Subscription(db.Model):
     include = db.Column(db.Boolean, default=True)
 
     annual_amount = db.Column(db.Float, default=0.0)
+    period = db.Column(db.Enum(Period, native_enum=False, length=16))
 
 
 class FutureBudget(db.Model):
     __tablename__ = 'future_budget'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
 
     phase = db.Column(db.String(120), nullable=False)
     age_range = db.Column(db.String(64))                 
@@ -177,15 +203,19 @@ class FutureBudget(db.Model):
 
 class EpicExperience(db.Model):
     __tablename__ = 'epic_experiences'
+    __table_args__ = (db.Index('ix_epic_experiences_user_id_include_annual_amount',
+                               'user_id', 'include', 'annual_amount'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     epic_years = 10
 
     item = db.Column(db.String(160), nullable=False)        
     amount = db.Column(db.Float, default=0.0)               
     frequency = db.Column(db.String(32), default='Once only')
     include = db.Column(db.Boolean, default=True)
+    period = db.Column(db.Enum(Period, native_enum=False, length=16))
+    annual_amount = db.Column(db.Float)              # one-offs spread over EPIC_YEARS
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -195,7 +225,7 @@ class EpicExperience(db.Model):
 
 class IncomeLayer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     layer = db.Column(db.String(64))
     description = db.Column(db.String(128))
     start_age = db.Column(db.Integer)
@@ -208,7 +238,7 @@ class SpendingAllocation(db.Model):
     __tablename__ = 'spending_allocation'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
 
     # e.g. Lifestyle, Set up, etc...
     phase = db.Column(db.String(120), nullable=False)
@@ -235,7 +265,7 @@ class DebtPaydown(db.Model):
     __tablename__ = 'debt_paydown'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, index=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), index=True, nullable=False)
 
     name = db.Column(db.String(120), default='')
     principal = db.Column(db.Float, default=0.0)                 # starting balance
@@ -251,7 +281,7 @@ class EnoughCalculator(db.Model):
     __tablename__ = 'enough_calculator'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
 
     # inputs
     use_future_budget = db.Column(db.String(8), nullable=False, default='Yes')  # yes or no
@@ -269,3 +299,62 @@ class EnoughCalculator(db.Model):
 
     created_at        = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at        = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+
+#----------------------------------------------
+# Dashboard read model
+
+class FinancialSnapshot(db.Model):
+    __tablename__ = 'financial_snapshot'
+    __table_args__ = (db.UniqueConstraint('user_id', 'source', name='uq_financial_snapshot_user_source'),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    source = db.Column(db.String(16), nullable=False)          # 'spreadsheet' or 'calculator'
+    digest = db.Column(db.String(64))                           # upload hash for spreadsheet snapshots
+    parser_version = db.Column(db.Integer)                      # excel_parser.PARSER_VERSION that parsed it
+
+    # totals
+    net_worth         = db.Column(db.Float, default=0.0)
+    assets_total      = db.Column(db.Float, default=0.0)
+    liabilities_total = db.Column(db.Float, default=0.0)
+    income_annual     = db.Column(db.Float, default=0.0)
+    subs_annual       = db.Column(db.Float, default=0.0)
+    expenses_annual   = db.Column(db.Float, default=0.0)
+    surplus_annual    = db.Column(db.Float, default=0.0)
+    epic_annual       = db.Column(db.Float, default=0.0)
+
+    breakdowns = db.Column(db.JSON)     # income / subscriptions / expense buckets / budget targets
+    series     = db.Column(db.JSON)     # super, savings and drawdown projections
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# ---------- Annualised amounts ----------
+# period and annual_amount are derived from amount/frequency whenever a row is
+# written, so summaries can SUM(annual_amount). Core INSERTs (bulk_import) skip
+# these hooks and use annual_fields directly.
+
+def annual_fields(model, amount, frequency, annual_amount=None):
+    """{'period', 'annual_amount'} for a row of Income, Expense, Subscription or EpicExperience."""
+    if model is EpicExperience:
+        annual_amount = epic_annual(amount, frequency)
+    elif model is not Subscription or annual_amount is None:
+        # subscriptions keep the annual cost entered on the page
+        annual_amount = recurring_annual(amount, frequency)
+    return {'period': period_of(frequency), 'annual_amount': annual_amount}
+
+
+def _annualise(mapper, connection, target):
+    frequency = target.frequency
+    if frequency is None and mapper.columns['frequency'].default is not None:
+        frequency = mapper.columns['frequency'].default.arg      # what the INSERT will store
+    fields = annual_fields(type(target), target.amount, frequency, target.annual_amount)
+    target.period, target.annual_amount = fields['period'], fields['annual_amount']
+
+
+for _model in (Income, Expense, Subscription, EpicExperience):
+    event.listen(_model, 'before_insert', _annualise)
+    event.listen(_model, 'before_update', _annualise)
@@ -0,0 +1,166 @@
+import os
+import hashlib
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from flask import current_app
+from .excel_parser import PARSER_VERSION, parse_excel, sheet_keys
+
+
+# Parsed spreadsheets keyed by SHA-256 of the file bytes and the parser version.
+# Tier 1: bounded in-memory LRU. Tier 2: pickles in PARSE_CACHE_FOLDER (survives restarts).
+# Below both, SheetCache keeps per-sheet results so a re-upload with one edited
+# tab only parses that tab (see excel_fingerprint).
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def file_digest(path, chunk_size=1 << 16):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_folder():
+    folder = current_app.config['PARSE_CACHE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _key(digest):
+    return f"{digest}.v{PARSER_VERSION}"
+
+
+def _disk_path(digest):
+    return os.path.join(_cache_folder(), f"{_key(digest)}.pkl")
+
+
+def _remember(digest, data):
+    _memory[_key(digest)] = data
+    _memory.move_to_end(_key(digest))
+    while len(_memory) > current_app.config.get('PARSE_CACHE_SIZE', 32):
+        _memory.popitem(last=False)
+
+
+def get_cached(digest):
+    """Return the parsed result for a digest from memory or disk, or None."""
+    with _lock:
+        if _key(digest) in _memory:
+            _memory.move_to_end(_key(digest))
+            return _memory[_key(digest)]
+
+    disk_path = _disk_path(digest)
+    if not os.path.exists(disk_path):
+        return None
+    try:
+        with open(disk_path, 'rb') as f:
+            data = pickle.load(f)
+    except Exception:
+        os.remove(disk_path)
+        return None
+
+    with _lock:
+        _remember(digest, data)
+    return data
+
+
+def store(digest, data):
+    with _lock:
+        _remember(digest, data)
+
+    disk_path = _disk_path(digest)
+    tmp_path = f"{disk_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, disk_path)
+
+
+class SheetCache:
+    """Per-sheet parse results pickled under folder; plain data, so it can be handed to the parse pool."""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            os.remove(path)
+            return None
+        os.utime(path)                # newest entries survive prune_sheets
+        return data
+
+    def discard(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def __setitem__(self, key, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+
+
+def sheet_cache():
+    folder = os.path.join(_cache_folder(), 'sheets')
+    os.makedirs(folder, exist_ok=True)
+    return SheetCache(folder)
+
+
+def prune_sheets():
+    """Drop the least recently used sheet results beyond PARSE_SHEET_CACHE_SIZE."""
+    folder = sheet_cache().folder
+    entries = sorted(os.scandir(folder), key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in entries[current_app.config.get('PARSE_SHEET_CACHE_SIZE', 1024):]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def lookup(path):
+    """Return (digest, cached result or None) for a file without parsing it."""
+    digest = file_digest(path)
+    return digest, get_cached(digest)
+
+
+def get_parsed(path):
+    """parse_excel(path), served from the cache when the file content was parsed before."""
+    digest, data = lookup(path)
+    if data is None:
+        data = parse_excel(path, sheet_cache=sheet_cache())
+        store(digest, data)
+    return data
+
+
+def evict(digest):
+    """Drop digest's cached result, including any left by older parser versions."""
+    with _lock:
+        _memory.pop(_key(digest), None)
+
+    for entry in os.scandir(_cache_folder()):
+        if entry.name.startswith(f"{digest}.") and entry.name.endswith('.pkl'):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def evict_file(path):
+    """Drop everything cached from the workbook at path: its parsed result and its per-sheet results."""
+    evict(file_digest(path))
+    cache = sheet_cache()
+    for key in sheet_keys(path):
+        cache.discard(key)
@@ -0,0 +1,146 @@
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from . import parse_cache, snapshots
+from .models import db
+from .excel_parser import parse_excel
+
+
+# Uploaded spreadsheets are parsed in a process pool so pandas never runs on a
+# request thread. Results land in parse_cache; the dashboard polls job status.
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+JOB_HISTORY = 256          # finished jobs kept around for status polling
+
+_executor = None
+_jobs = OrderedDict()      # job_id -> job dict
+_lock = threading.Lock()
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Workers come from a clean forkserver/spawn process rather than being
+        # forked from a threaded web process that holds open database connections.
+        context = multiprocessing.get_context(current_app.config.get('PARSE_START_METHOD', 'spawn'))
+        _executor = ProcessPoolExecutor(max_workers=current_app.config.get('PARSE_WORKERS', 2),
+                                        mp_context=context)
+    return _executor
+
+
+def _drop_executor(executor):
+    """Forget a pool whose worker died, so the next job starts a new one.
+
+    A broken pool has already failed all of its futures, so nothing is cancelled here.
+    """
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False)
+
+
+def _state(job):
+    future = job.get('future')
+    if job['status'] in (DONE, FAILED):
+        return job['status']
+    return RUNNING if future.running() or future.done() else QUEUED
+
+
+def _pending_count():
+    return sum(1 for job in _jobs.values() if _state(job) in (QUEUED, RUNNING))
+
+
+def _trim_history():
+    finished = [job_id for job_id, job in _jobs.items() if _state(job) in (DONE, FAILED)]
+    for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+        del _jobs[job_id]
+
+
+def _finish(app, executor, job_id, future):
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return
+
+    try:
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            with _lock:
+                _drop_executor(executor)
+        if error is None:
+            with app.app_context():
+                try:
+                    parse_cache.store(job['digest'], future.result())
+                    snapshots.save_spreadsheet(job['user_id'], job['digest'], future.result())
+                except Exception:
+                    db.session.rollback()
+                    raise
+                finally:
+                    db.session.remove()
+    except Exception as e:
+        # Anything left RUNNING here would be polled forever.
+        error = e
+    with _lock:
+        job['status'] = FAILED if error else DONE
+        job['error'] = str(error) if error else None
+
+
+def submit(path, user_id, digest=None):
+    """Queue a parse of path and return the job id.
+
+    Raises QueueFull when PARSE_QUEUE_DEPTH jobs are already waiting or running.
+    """
+    if digest is None:
+        digest, cached = parse_cache.lookup(path)
+    else:
+        cached = parse_cache.get_cached(digest)
+    job_id = uuid.uuid4().hex
+    job = {'user_id': user_id, 'path': path, 'digest': digest, 'status': QUEUED, 'error': None}
+
+    with _lock:
+        _trim_history()
+        if cached is not None:
+            job['status'] = DONE
+            _jobs[job_id] = job
+            return job_id
+
+        if _pending_count() >= current_app.config.get('PARSE_QUEUE_DEPTH', 8):
+            raise QueueFull()
+        executor = _get_executor()
+        try:
+            job['future'] = executor.submit(parse_excel, path, sheet_cache=parse_cache.sheet_cache())
+        except BrokenProcessPool:
+            _drop_executor(executor)
+            executor = _get_executor()
+            job['future'] = executor.submit(parse_excel, path, sheet_cache=parse_cache.sheet_cache())
+        _jobs[job_id] = job
+
+    app = current_app._get_current_object()
+    job['future'].add_done_callback(lambda f: _finish(app, executor, job_id, f))
+    return job_id
+
+
+def find_pending(path, user_id):
+    """Job id of user_id's unfinished parse of path, if there is one."""
+    with _lock:
+        for job_id, job in _jobs.items():
+            if job['path'] == path and job['user_id'] == user_id and _state(job) in (QUEUED, RUNNING):
+                return job_id
+    return None
+
+
+def status(job_id, user_id):
+    """Status dict for one of user_id's jobs, or None if there is no such job."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job['user_id'] != user_id:
+            return None
+        return {'job_id': job_id, 'status': _state(job), 'error': job['error']}
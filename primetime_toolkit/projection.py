@@ -0,0 +1,47 @@
+import numpy as np
+
+
+# Savings and drawdown projections in closed form. Every argument broadcasts,
+# so passing arrays of rates / contributions / withdrawals returns one row per
+# scenario instead of looping month by month.
+
+ANNUAL_RATE = 0.03
+HORIZON_YEARS = 10
+WITHDRAWAL = 3000
+
+
+def _column(value):
+    """Scalars stay scalars; arrays get a trailing axis to broadcast against months."""
+    value = np.asarray(value, dtype=float)
+    return value if value.ndim == 0 else value[..., np.newaxis]
+
+
+def months(years=HORIZON_YEARS):
+    return np.arange(int(round(years * 12)) + 1)
+
+
+def annuity_factor(monthly_rate, n):
+    """Future value of 1 paid at the end of each of n months: ((1 + r)^n - 1) / r."""
+    r = np.asarray(monthly_rate, dtype=float)
+    growth = np.power(1 + r, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(r == 0, n, (growth - 1) / np.where(r == 0, 1, r))
+
+
+def savings_series(contribution, annual_rate=ANNUAL_RATE, years=HORIZON_YEARS):
+    """Balance at month 0..N when `contribution` is saved at the end of each month."""
+    n = months(years)
+    r = _column(annual_rate) / 12
+    return _column(contribution) * annuity_factor(r, n)
+
+
+def drawdown_series(balance, withdrawal=WITHDRAWAL, annual_rate=ANNUAL_RATE, years=HORIZON_YEARS):
+    """Balance after each of N+1 months of growth then withdrawal, floored at zero."""
+    n = months(years) + 1
+    r = _column(annual_rate) / 12
+    remaining = _column(balance) * np.power(1 + r, n) - _column(withdrawal) * annuity_factor(r, n)
+    return np.maximum(remaining, 0)
+
+
+def as_list(series):
+    return np.round(series, 2).tolist()
@@ -0,0 +1,154 @@
+import math
+from .models import db, FinancialSnapshot
+from .excel_parser import PARSER_VERSION
+
+
+# One compact row per (user, source) holding everything the dashboards render.
+# Spreadsheet snapshots are written once per parsed upload and parser version
+# (see spreadsheet_is_current); calculator snapshots are kept current by the
+# save endpoints (see calculator_summary.refresh).
+
+SPREADSHEET, CALCULATOR = 'spreadsheet', 'calculator'
+
+
+def get(user_id, source, for_update=False):
+    query = FinancialSnapshot.query.filter_by(user_id=user_id, source=source)
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
+
+
+def _row(user_id, source):
+    row = get(user_id, source)
+    if row is None:
+        row = FinancialSnapshot(user_id=user_id, source=source)
+        db.session.add(row)
+    return row
+
+
+# ---------- Spreadsheet ----------
+
+def spreadsheet_epic_annual(data):
+    epic_years = data.get("epic", {}).get("years", 10)
+    epic_items = data.get("epic", {}).get("items", [])
+
+    return sum(
+        float(e.get("value", 0.0)) * (
+            1 if str(e.get("frequency", "")).lower() == "once only" else
+            epic_years if str(e.get("frequency", "")).lower() == "every year" else
+            math.floor(epic_years / 2)
+        )
+        for e in epic_items if isinstance(e, dict)
+    ) / max(epic_years, 1)
+
+
+def spreadsheet_is_current(row, digest):
+    """Whether row was built from the upload with this digest by the current parser."""
+    return row is not None and row.digest == digest and row.parser_version == PARSER_VERSION
+
+
+def save_spreadsheet(user_id, digest, data):
+    """Persist the parse_excel result for a user's upload and return the row."""
+    row = _row(user_id, SPREADSHEET)
+    row.digest = digest
+    row.parser_version = PARSER_VERSION
+    row.net_worth = float(data.get("net_worth", 0) or 0)
+    row.assets_total = float(data.get("assets", {}).get("total", 0) or 0)
+    row.liabilities_total = float(data.get("liabilities", {}).get("total", 0) or 0)
+    row.income_annual = float(data.get("income", {}).get("total", 0) or 0)
+    row.subs_annual = float(data.get("subscriptions", {}).get("total", 0) or 0)
+    row.expenses_annual = float(data.get("expenses", {}).get("total", 0) or 0)
+    row.surplus_annual = float(data.get("monthly_savings", 0) or 0)
+    row.epic_annual = float(spreadsheet_epic_annual(data))
+    row.breakdowns = {
+        "income": data.get("income", {}).get("breakdown", []),
+        "subscriptions": data.get("subscriptions", {}).get("breakdown", []),
+        "expense_buckets": dict(data.get("expenses", {}).get("buckets_sum", {})),
+    }
+    row.series = {
+        "super": data.get("super"),
+        "savings_over_time": data.get("savings_over_time"),
+        "drawdown_over_time": data.get("drawdown_over_time"),
+        "emergency_fund": data.get("emergency_fund"),
+    }
+    db.session.commit()
+    return row
+
+
+def spreadsheet_context(row):
+    """Template variables for dashboard-spreadsheet.html (zeros when there is no snapshot)."""
+    if row is None:
+        return {
+            "net_worth": 0, "assets_total": 0, "liabilities_total": 0,
+            "income_annual": 0, "income_breakdown": "",
+            "subs_annual": 0, "subs_breakdown": "",
+            "expenses_annual": 0, "expense_buckets_sum": 0,
+            "surplus_annual": 0, "epic_annual": 0.0, "post_epic_surplus": 0,
+        }
+
+    breakdowns = row.breakdowns or {}
+    return {
+        "net_worth": row.net_worth,
+        "assets_total": row.assets_total,
+        "liabilities_total": row.liabilities_total,
+        "income_annual": row.income_annual,
+        "income_breakdown": breakdowns.get("income", []),
+        "subs_annual": row.subs_annual,
+        "subs_breakdown": breakdowns.get("subscriptions", []),
+        "expenses_annual": row.expenses_annual,
+        "expense_buckets_sum": breakdowns.get("expense_buckets", {}),
+        "surplus_annual": row.surplus_annual,
+        "epic_annual": row.epic_annual,
+        "post_epic_surplus": row.surplus_annual - row.epic_annual,
+    }
+
+
+# ---------- Web calculators ----------
+
+def save_calculator(user_id, summary):
+    """Persist a get_calculator_summary payload and return the row."""
+    row = write_calculator(user_id, summary)
+    db.session.commit()
+    return row
+
+
+def write_calculator(user_id, summary):
+    """Stage a get_calculator_summary payload in the current transaction."""
+    row = _row(user_id, CALCULATOR)
+    row.net_worth = float(summary["net_worth"] or 0.0)
+    row.assets_total = float(summary["assets_total"] or 0.0)
+    row.liabilities_total = float(summary["liabilities_total"] or 0.0)
+    row.income_annual = float(summary["income_annual"] or 0.0)
+    row.subs_annual = float(summary["subs_annual"] or 0.0)
+    row.expenses_annual = float(summary["expenses_annual"] or 0.0)
+    row.surplus_annual = float(summary["surplus_annual"] or 0.0)
+    row.epic_annual = float(summary["epic_annual"] or 0.0)
+    row.breakdowns = {
+        "income": summary["income_breakdown"],
+        "subscriptions": summary["subs_breakdown"],
+        "expense_buckets": float(summary["expense_buckets_sum"] or 0.0),
+        "actual": summary["actual_breakdown"],
+        "budget_targets": summary["budget_targets"],
+    }
+    return row
+
+
+def calculator_summary(row):
+    """Rebuild the get_calculator_summary dict from a snapshot row."""
+    breakdowns = row.breakdowns or {}
+    return {
+        "assets_total": row.assets_total,
+        "liabilities_total": row.liabilities_total,
+        "income_annual": row.income_annual,
+        "income_breakdown": breakdowns.get("income", []),
+        "subs_annual": row.subs_annual,
+        "subs_breakdown": breakdowns.get("subscriptions", []),
+        "expense_buckets_sum": breakdowns.get("expense_buckets", 0.0),
+        "epic_annual": row.epic_annual,
+        "expenses_annual": row.expenses_annual,
+        "net_worth": row.net_worth,
+        "surplus_annual": row.surplus_annual,
+        "surplus_monthly": row.surplus_annual / 12.0,
+        "actual_breakdown": breakdowns.get("actual", []),
+        "budget_targets": breakdowns.get("budget_targets", {}),
+    }
@@ -34,6 +34,7 @@
   function addRow(prefill = {}) {
     const frag = rowTemplate.content.cloneNode(true);
     const row = frag.querySelector('tr.asset-row');
+    if (prefill.id) row.dataset.id = prefill.id;
 
     // Prefill if provided
     if (prefill.category) row.querySelector('.category').value = prefill.category;
@@ -59,6 +60,7 @@
   }
 
   function clearAll() {
+    tbody.querySelectorAll('tr.asset-row').forEach(row => autosave?.markRemoved(row));
     tbody.innerHTML = '';
     addRow();
     recalcTotals();
@@ -127,8 +129,9 @@
 
   const saveBtn = document.getElementById('saveAssetsBtn');
 
-  function getAssetRows() {
-    return Array.from(tbody.querySelectorAll('tr.asset-row')).map(row => ({
+  function assetFromRow(row) {
+    return {
+      id: row.dataset.id || null,
       category: row.querySelector('.category')?.value || '',
       description: row.querySelector('.description')?.value || '',
       amount: parseAmount(row.querySelector('.amount')?.value),
@@ -136,9 +139,23 @@
       include: row.querySelector('.include-toggle')?.checked || false,
       drawdown: row.querySelector('.drawdown-select')?.value || 'none',
       drawdown_amount: parseAmount(row.querySelector('.drawdown-amount')?.value)
-    }));
+    };
+  }
+
+  function getAssetRows() {
+    return Array.from(tbody.querySelectorAll('tr.asset-row')).map(assetFromRow);
   }
 
+  // Autosave edited rows (see autosave.js); the Save buttons still send the whole table.
+  const autosave = window.createAutosave && window.calculatorEtag
+    ? window.createAutosave({
+        name: 'assets',
+        etag: window.calculatorEtag,
+        rowData: assetFromRow,
+        onStale: () => alert('Your assets were changed in another window. Reload the page to keep editing.')
+      })
+    : null;
+
   // === Progress helper (localStorage) ===
   function markStepComplete(stepKey) {
     let completed = JSON.parse(localStorage.getItem("completedSteps") || "[]");
@@ -207,6 +224,7 @@
     const btn = e.target.closest('.remove-row');
     if (btn) {
       const row = btn.closest('tr.asset-row');
+      autosave?.markRemoved(row);
       if (row) row.remove();
       if (tbody.querySelectorAll('tr.asset-row').length === 0) {
         addRow();
@@ -236,6 +254,7 @@
   tbody.addEventListener('input', (e) => {
     const t = e.target;
     if (!t) return;
+    autosave?.markDirty(t.closest('tr.asset-row'));
 
     // Limit .amount and .drawdown-amount inputs to 2 decimal places
     if (t.classList.contains('amount') || t.classList.contains('drawdown-amount')) {
@@ -259,7 +278,10 @@
       recalcTotals();
     }
   });
-  tbody.addEventListener('change', onTbodyInput);
+  tbody.addEventListener('change', (e) => {
+    autosave?.markDirty(e.target?.closest('tr.asset-row'));
+    onTbodyInput(e);
+  });
   tbody.addEventListener('click', onTbodyClick);
   tbody.addEventListener('blur', onTbodyBlur, true);
 
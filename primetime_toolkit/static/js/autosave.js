@@ -0,0 +1,82 @@
+// ====== Row-level autosave for calculator tables ======
+// Edits are coalesced per row: however many keystrokes land inside `delay`,
+// each changed row is sent once, in one PATCH, and only one request is in
+// flight at a time. Every request carries the data version the page was
+// rendered with (If-Match); if the data changed elsewhere the server answers
+// 412 and autosave stops so nothing is overwritten.
+window.createAutosave = function ({ name, etag, rowData, delay = 1500, onStale }) {
+  let version = etag;
+  const dirty = new Set();     // row elements edited since the last request
+  const removed = new Set();   // ids of stored rows removed since the last request
+  let timer = null;
+  let inFlight = false;
+  let stale = false;
+
+  function schedule() {
+    if (stale) return;
+    clearTimeout(timer);
+    timer = setTimeout(flush, delay);
+  }
+
+  function requeue(rows, ids) {
+    rows.forEach(row => dirty.add(row));
+    ids.forEach(id => removed.add(id));
+  }
+
+  async function flush() {
+    timer = null;
+    if (inFlight || stale || (!dirty.size && !removed.size)) return;
+
+    const rows = [...dirty].filter(row => row.isConnected);
+    const ids = [...removed];
+    const upsert = rows.map(rowData);
+    const fresh = rows.filter(row => !row.dataset.id);   // inserted; their ids come back in this order
+    dirty.clear();
+    removed.clear();
+
+    inFlight = true;
+    let saved = false;
+    try {
+      const res = await fetch(`/calculators/${name}/rows`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json', 'If-Match': `"${version}"` },
+        body: JSON.stringify({ upsert, delete: ids })
+      });
+      if (res.status === 412) {
+        stale = true;
+        onStale?.();
+        return;
+      }
+      if (!res.ok) {
+        requeue(rows, ids);   // retried with the next edit
+        return;
+      }
+      version = (res.headers.get('ETag') || '').replace(/^W\/|"/g, '') || version;
+      const data = await res.json();
+      (data.ids || []).forEach((id, i) => { if (fresh[i]) fresh[i].dataset.id = id; });
+      saved = true;
+    } catch (e) {
+      requeue(rows, ids);
+    } finally {
+      inFlight = false;
+      if (saved && (dirty.size || removed.size)) schedule();   // edits made while this request was out
+    }
+  }
+
+  return {
+    markDirty(row) {
+      if (!row) return;
+      dirty.add(row);
+      schedule();
+    },
+    markRemoved(row) {
+      if (!row) return;
+      dirty.delete(row);
+      if (row.dataset.id) {
+        removed.add(row.dataset.id);
+        schedule();
+      }
+    },
+    flush
+  };
+};
@@ -156,6 +156,7 @@ window.addEventListener('load', () => {
 
   function collectItems() {
     return [...tbody.querySelectorAll('tr.epic-row')].map(row => ({
+      id: row.dataset.id || null,
       item: row.querySelector('.item')?.value?.trim() || '',
       amount: num(row.querySelector('.amount')?.value),
       frequency: row.querySelector('.freq')?.value || 'Once only',
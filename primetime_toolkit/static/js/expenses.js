@@ -184,6 +184,7 @@ document.addEventListener('DOMContentLoaded', () => {
   function addRow(prefill = {}) {
     const frag = rowTemplate.content.cloneNode(true);
     const row = frag.querySelector('tr.expense-row');
+    if (prefill.id) row.dataset.id = prefill.id;
 
     // Accept multiple possible keys from older saves:
     // Category: category | type_group | group
@@ -216,6 +217,7 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 
   function clearAll() {
+    tbody.querySelectorAll('tr.expense-row').forEach(row => autosave?.markRemoved(row));
     tbody.innerHTML = '';
     addRow();
     recalcAll();
@@ -254,19 +256,35 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 
   // ===== Data extract =====
-  function getRows() {
-    return Array.from(tbody.querySelectorAll('tr.expense-row')).map(row => ({
+  function expenseFromRow(row) {
+    return {
+      id: row.dataset.id || null,
       category: row.querySelector('.category')?.value || '',
       item: row.querySelector('.item')?.value || '',
       amount: parseNum(row.querySelector('.amount')?.value),
       frequency: row.querySelector('.frequency')?.value || 'monthly',
       type: row.querySelector('.type')?.value || 'Essential'
-    }));
+    };
+  }
+
+  function getRows() {
+    return Array.from(tbody.querySelectorAll('tr.expense-row')).map(expenseFromRow);
   }
 
+  // Autosave edited rows (see autosave.js); Save & Next still sends the whole table.
+  const autosave = window.createAutosave && window.calculatorEtag
+    ? window.createAutosave({
+        name: 'expenses',
+        etag: window.calculatorEtag,
+        rowData: expenseFromRow,
+        onStale: () => alert('Your expenses were changed in another window. Reload the page to keep editing.')
+      })
+    : null;
+
   // ===== Events =====
   tbody.addEventListener('input', (e) => {
     const t = e.target;
+    autosave?.markDirty(t?.closest('tr.expense-row'));
     if (t && t.classList.contains('amount')) {
       const val = t.value;
       if (val.includes('.')) {
@@ -287,6 +305,7 @@ document.addEventListener('DOMContentLoaded', () => {
   });
   tbody.addEventListener('change', (e) => {
     const t = e.target;
+    autosave?.markDirty(t?.closest('tr.expense-row'));
     if (t && t.classList.contains('category')) {
       const row = t.closest('tr.expense-row');
       const itemSel = row?.querySelector('.item');
@@ -301,6 +320,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const btn = e.target.closest('.remove-row');
     if (btn) {
       const row = btn.closest('tr.expense-row');
+      autosave?.markRemoved(row);
       if (row) row.remove();
       if (tbody.children.length === 0) addRow();
       recalcAll();
@@ -44,6 +44,7 @@ document.addEventListener('DOMContentLoaded', () => {
   function addRow(prefill = {}) {
     const frag = rowTemplate.content.cloneNode(true);
     const row  = frag.querySelector('tr.future-row');
+    if (prefill.id) row.dataset.id = prefill.id;
 
     // Expected classes in the template:
     // .phase .age_range .years .baseline .oneoff .epic  and a cell .annual
@@ -97,6 +98,7 @@ document.addEventListener('DOMContentLoaded', () => {
       const annual   = baseline + oneoff + epic;
 
       return {
+        id: row.dataset.id || null,
         phase: row.querySelector('.phase')?.value?.trim() || '',
         age_range: row.querySelector('.age_range')?.value?.trim() || '',
         years_in_phase: parseNum(row.querySelector('.years')?.value),
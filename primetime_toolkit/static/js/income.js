@@ -52,6 +52,7 @@ document.addEventListener('DOMContentLoaded', () => {
   function addRow(prefill = {}) {
     const frag = rowTemplate.content.cloneNode(true);
     const row = frag.querySelector('tr.income-row');
+    if (prefill.id) row.dataset.id = prefill.id;
 
     // Accept multiple possible keys from older saves: source | category | type
     const rawSource = prefill.source ?? prefill.category ?? prefill.type ?? '';
@@ -80,6 +81,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
   function getRows() {
     return Array.from(tbody.querySelectorAll('tr.income-row')).map(row => ({
+      id: row.dataset.id || null,
       source: row.querySelector('.source')?.value || '',
       amount: to2(row.querySelector('.amount')?.value),
       frequency: row.querySelector('.frequency')?.value || '',
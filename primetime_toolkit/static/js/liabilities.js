@@ -64,6 +64,7 @@
     function addRow(prefill = {}) {
       const frag = rowTemplate.content.cloneNode(true);
       const row = frag.querySelector('tr.liability-row');
+      if (prefill.id) row.dataset.id = prefill.id;
       const catSelect = row.querySelector('.category');
       if (prefill && Object.prototype.hasOwnProperty.call(prefill, 'category')) {
         setCategory(catSelect, prefill.category);
@@ -259,6 +260,7 @@
         const monthly = to2(row.querySelector('.monthly')?.value);
         const notes = row.querySelector('.notes')?.value || '';
         return {
+          id: row.dataset.id || null,
           // keep existing keys for frontend usage
           category,
           name,
@@ -50,6 +50,7 @@
 function addRow(prefill = {}) {
   const frag = rowTemplate.content.cloneNode(true);
   const row = frag.querySelector('tr.subs-row');
+  if (prefill.id) row.dataset.id = prefill.id;
 
   // Accept multiple possible keys for service name
   const serviceEl = row.querySelector('.service');
@@ -179,7 +180,7 @@ function recalcTotals() {
 
       const annual_amount = include ? amount * (PERIODS_PER_YEAR[frequency] ?? 0) : 0;
 
-      return { name, provider, amount, frequency, notes: '', include, annual_amount };
+      return { id: row.dataset.id || null, name, provider, amount, frequency, notes: '', include, annual_amount };
     });
   }
 
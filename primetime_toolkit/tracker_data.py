@@ -0,0 +1,60 @@
+from sqlalchemy import func
+from .models import (db, LifeExpectancy, Asset, Liability, Income, Expense, Subscription, FutureBudget,
+                     EpicExperience, IncomeLayer, SpendingAllocation)
+
+
+# Everything the /tracker page needs (totals and which calculators have data),
+# read as one row of scalar subqueries. No ORM objects are loaded: the page
+# only shows completion ticks, so the rows themselves are never needed.
+
+def _sum(column, *criteria):
+    return db.select(func.coalesce(func.sum(column), 0.0)).where(*criteria).scalar_subquery()
+
+
+def _exists(model, user_id):
+    return db.select(model.id).where(model.user_id == user_id).exists()
+
+
+def load(user_id):
+    """(data, completion_flags) for the tracker page, in one query."""
+    row = db.session.execute(db.select(
+        _sum(Asset.amount, Asset.user_id == user_id).label('assets_total'),
+        _sum(Liability.amount, Liability.user_id == user_id).label('liabilities_total'),
+        _sum(Income.amount, Income.user_id == user_id, Income.include == True).label('income_total'),
+        _sum(Expense.amount, Expense.user_id == user_id).label('expense_rows_total'),
+        _sum(Subscription.annual_amount, Subscription.user_id == user_id,
+             Subscription.include == True).label('subscriptions_total'),
+        _exists(LifeExpectancy, user_id).label('life'),
+        _exists(FutureBudget, user_id).label('future_budget'),
+        _exists(EpicExperience, user_id).label('epic'),
+        _exists(IncomeLayer, user_id).label('income_layers'),
+        _exists(SpendingAllocation, user_id).label('spending_allocation'),
+    )).one()
+
+    assets_total = row.assets_total
+    liabilities_total = row.liabilities_total
+    net_worth = assets_total - liabilities_total
+    # merging subscriptions into expenses
+    expenses_total = row.expense_rows_total + row.subscriptions_total
+
+    completion_flags = {
+        "life": bool(row.life),
+        "assets": assets_total > 0,
+        "liabilities": liabilities_total > 0,
+        "income": row.income_total > 0,
+        "expenses": expenses_total > 0,
+        "subscriptions": row.subscriptions_total > 0,
+        "future_budget": bool(row.future_budget),
+        "epic": bool(row.epic),
+        "income_layers": bool(row.income_layers),
+        "spending_allocation": bool(row.spending_allocation),
+        "summary": net_worth != 0
+    }
+    data = {
+        "assets_total": assets_total,
+        "liabilities_total": liabilities_total,
+        "income_total": row.income_total,
+        "expenses_total": expenses_total,
+        "net_worth": net_worth
+    }
+    return data, completion_flags
@@ -0,0 +1,117 @@
+import os
+import time
+import hashlib
+import tempfile
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from . import parse_cache
+
+
+# Uploaded workbooks live under UPLOAD_FOLDER/<user_id>/<sha256>.<ext>.
+# Identical re-uploads are stored once, LATEST points at the user's newest
+# upload, and sweep() removes versions beyond the retention policy.
+
+LATEST = 'LATEST'
+
+
+def _user_folder(user_id):
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], str(int(user_id)))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _set_latest(folder, name):
+    tmp_path = os.path.join(folder, f"{LATEST}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(name)
+    os.replace(tmp_path, os.path.join(folder, LATEST))
+
+
+def save_upload(file, user_id):
+    """Store an uploaded FileStorage for user_id; returns (digest, path)."""
+    folder = _user_folder(user_id)
+    ext = file.filename.rsplit('.', 1)[1].lower()
+
+    h = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(1 << 16), b''):
+                h.update(chunk)
+                out.write(chunk)
+        digest = h.hexdigest()
+        name = f"{digest}.{ext}"
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            os.utime(path)            # bump it so retention sees it as the newest version
+        else:
+            os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _set_latest(folder, name)
+    sweep(user_id)
+    return digest, path
+
+
+def latest(user_id):
+    """(digest, path) of user_id's most recent upload, or None."""
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], str(int(user_id)))
+    try:
+        with open(os.path.join(folder, LATEST)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+
+    path = os.path.join(folder, name)
+    if not name or not os.path.exists(path):
+        return None
+    return name.split('.', 1)[0], path
+
+
+def versions(user_id):
+    """Paths of user_id's stored uploads, newest first."""
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], str(int(user_id)))
+    if not os.path.isdir(folder):
+        return []
+    paths = [
+        os.path.join(folder, f) for f in os.listdir(folder)
+        if f != LATEST and not f.endswith(('.tmp', '.part'))
+    ]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def sweep(user_id):
+    """Delete versions beyond UPLOAD_KEEP_VERSIONS or older than UPLOAD_MAX_AGE_DAYS.
+
+    The latest upload is always kept. Returns the removed paths.
+    """
+    keep = current_app.config.get('UPLOAD_KEEP_VERSIONS', 3)
+    max_age = current_app.config.get('UPLOAD_MAX_AGE_DAYS', 180) * 86400
+    current = latest(user_id)
+    now = time.time()
+
+    removed = []
+    for i, path in enumerate(versions(user_id)):
+        if current and path == current[1]:
+            continue
+        if i >= keep or now - os.path.getmtime(path) > max_age:
+            os.remove(path)
+            parse_cache.evict(os.path.basename(path).split('.', 1)[0])
+            removed.append(path)
+    parse_cache.prune_sheets()
+    return removed
+
+
+@click.command('sweep-uploads')
+@with_appcontext
+def sweep_uploads_command():
+    """Apply the upload retention policy to every user's folder."""
+    root = current_app.config['UPLOAD_FOLDER']
+    user_ids = [d for d in os.listdir(root) if d.isdigit()] if os.path.isdir(root) else []
+    removed = sum(len(sweep(int(uid))) for uid in user_ids)
+    click.echo(f"Removed {removed} old upload(s) across {len(user_ids)} user(s).")
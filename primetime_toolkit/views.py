@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, session, url_for, flash, jsonify
+from flask import Blueprint, Response, render_template, request, redirect, session, url_for, flash, jsonify
 from . import mail
 from flask import current_app
 from flask_mail import Mail, Message
@@ -8,10 +8,10 @@ from werkzeug.utils import secure_filename
 import os
 import json
 from primetime_toolkit.models import Assessment, IncomeLayer, LifeExpectancy, SpendingAllocation, db, Subscriber, Asset, Liability, Income, Expense, Subscription, FutureBudget, EpicExperience, DebtPaydown, EnoughCalculator
-from sqlalchemy import func, case
-from .excel_parser import parse_excel
+from . import accounts, calculator_rows, calculator_summary, data_version, exporter, parse_cache, parse_jobs, snapshots, tracker_data, upload_store
 import math
 from .extension import limiter
+from .engine import read_only
 
 views = Blueprint('views', __name__)
 
@@ -32,42 +32,31 @@ def dashboard():
 # -------- spreadsheet option ---------------------------
 
 @views.route('/dashboard-spreadsheet', methods=['GET'])
+@login_required
 def dashboard_spreadsheet():
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    data = {}
-    if os.path.exists(upload_folder):
-        files = [os.path.join(upload_folder, f) for f in os.listdir(upload_folder) if allowed_file(f)]
-        if files:
-            latest_file = max(files, key=os.path.getmtime)
-            data = parse_excel(latest_file)
-
-    epic_years = data.get("epic").get("years", 10)
-    epic_items = data.get("epic").get("items", [])
-    
-    epic_annual = sum(
-        float(e.get("value", 0.0)) * (
-            1 if str(e.get("frequency", "")).lower() == "once only" else
-            epic_years if str(e.get("frequency", "")).lower() == "every year" else
-            math.floor(epic_years / 2)
-        )
-        for e in epic_items if isinstance(e, dict)
-    ) / max(epic_years, 1)
-   
-    post_epic_surplus = data.get("monthly_savings", 0) - epic_annual
-
-    return render_template('dashboard-spreadsheet.html', 
-        net_worth = data.get("net_worth", 0),
-        assets_total = data.get("assets", {}).get("total", 0),
-        liabilities_total = data.get("liabilities", {}).get("total", 0),
-        income_annual = data.get("income", {}).get("total", 0),
-        income_breakdown = data.get("income", {}).get("breakdown", ""),
-        subs_annual = data.get("subscriptions", {}).get("total", 0),
-        subs_breakdown = data.get("subscriptions", {}).get("breakdown", ""),
-        expenses_annual = data.get("expenses", {}).get("total", 0),
-        expense_buckets_sum = data.get("expenses", {}).get("buckets_sum", 0),
-        surplus_annual = data.get("monthly_savings", 0),
-        epic_annual=epic_annual,
-        post_epic_surplus=post_epic_surplus,
+    snapshot = None
+    parse_job = None
+    upload = upload_store.latest(current_user.id)
+    if upload:
+        digest, latest_file = upload
+        snapshot = snapshots.get(current_user.id, snapshots.SPREADSHEET)
+        if not snapshots.spreadsheet_is_current(snapshot, digest):
+            cached = parse_cache.get_cached(digest)
+            if cached is not None:
+                snapshot = snapshots.save_spreadsheet(current_user.id, digest, cached)
+            else:
+                snapshot = None
+                # Never parse on the request thread: hand it to the job pool and let the page poll.
+                parse_job = parse_jobs.find_pending(latest_file, current_user.id)
+                if parse_job is None:
+                    try:
+                        parse_job = parse_jobs.submit(latest_file, current_user.id, digest=digest)
+                    except parse_jobs.QueueFull:
+                        flash("We're processing a lot of spreadsheets right now. Please refresh in a minute.", "error")
+
+    return render_template('dashboard-spreadsheet.html',
+        parse_job=parse_job,
+        **snapshots.spreadsheet_context(snapshot),
     )
 
 
@@ -77,6 +66,7 @@ def dashboard_spreadsheet():
 # ------- Web calculator option --------------------
 
 @views.route('/dashboard-web-calculator')
+@read_only
 @login_required
 def dashboard_web_calculator():
     print("Current User :", current_user)
@@ -392,10 +382,14 @@ def upload_excel():
         return redirect(request.url)
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        os.makedirs(upload_folder, exist_ok=True) 
-        file.save(os.path.join(upload_folder, filename))
+        digest, save_path = upload_store.save_upload(file, current_user.id)
+        try:
+            parse_jobs.submit(save_path, current_user.id, digest=digest)
+        except parse_jobs.QueueFull:
+            # The file is stored, so the dashboard queues the parse once there is room.
+            flash("File uploaded. We're processing a lot of spreadsheets right now, "
+                  "so your dashboard will update in a minute.", "warning")
+            return redirect(url_for('views.dashboard_spreadsheet'))
         flash("File uploaded successfully", "success")
         return redirect(url_for('views.dashboard_spreadsheet'))
 
@@ -403,6 +397,15 @@ def upload_excel():
     return redirect(request.url)
 
 
+@views.route('/parse-status/<job_id>', methods=['GET'])
+@login_required
+def parse_status(job_id):
+    status = parse_jobs.status(job_id, current_user.id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(status)
+
+
 
 @views.route('/download_budget')
 def download_budget():
@@ -411,6 +414,28 @@ def download_budget():
     return send_from_directory(file_path, 'Budget_Template.xlsx', as_attachment=True)
 
 
+def _data_etag(user_id, version):
+    return f"{user_id}-{version}"
+
+
+@views.route('/export-calculators')
+@read_only
+@login_required
+@limiter.limit("10 per minute", key_func=lambda: current_user.id)
+def export_calculators():
+    path, version = exporter.export_path(current_user.id)
+    response = Response(
+        exporter.iter_file(path),
+        mimetype=exporter.XLSX_MIMETYPE,
+        headers={
+            'Content-Disposition': 'attachment; filename="Prime_Time_My_Calculators.xlsx"',
+            'Content-Length': str(os.path.getsize(path)),
+        },
+    )
+    response.set_etag(_data_etag(current_user.id, version))
+    return response.make_conditional(request)
+
+
 
 # ---------------------------------------------------------------------
 # Subscribe to newsletter block 
@@ -488,45 +513,10 @@ def subscribe():
 #--------Tracker-----------
 
 @views.route('/tracker')
+@read_only
 @login_required
 def tracker():
-    user_id = current_user.id
-
-    life = LifeExpectancy.query.filter_by(user_id=user_id).first()
-    assets = Asset.query.filter_by(user_id=user_id).all()
-    liabilities = Liability.query.filter_by(user_id=user_id).all()
-    income = Income.query.filter_by(user_id=user_id).all()
-    expenses = Expense.query.filter_by(user_id=user_id).all()
-    subscriptions = Subscription.query.filter_by(user_id=user_id).all()
-    future_budget = FutureBudget.query.filter_by(user_id=user_id).all()
-    epic = EpicExperience.query.filter_by(user_id=user_id).all()
-    income_layers = IncomeLayer.query.filter_by(user_id=user_id).all()
-    spending_allocation = SpendingAllocation.query.filter_by(user_id=user_id).all()
-
-
-    assets_total = sum(a.amount for a in assets if a.amount)
-    liabilities_total = sum(l.amount for l in liabilities if l.amount)
-    income_total = sum(i.amount for i in income if i.amount and i.include)
-    expenses_total = sum(e.amount for e in expenses if e.amount)
-    subscriptions_total = sum(s.annual_amount for s in subscriptions if s.include)
-    net_worth = assets_total - liabilities_total
-
-    # merging subscriptions into expenses
-    expenses_total += subscriptions_total
-
-    completion_flags = {
-        "life": life is not None,
-        "assets": assets_total > 0,
-        "liabilities": liabilities_total > 0,
-        "income": income_total > 0,
-        "expenses": expenses_total > 0,
-        "subscriptions": subscriptions_total > 0,
-        "future_budget": len(future_budget) > 0,
-        "epic": len(epic) > 0,
-        "income_layers": len(income_layers) > 0,
-        "spending_allocation": len(spending_allocation) > 0,
-        "summary": net_worth != 0
-    }
+    data, completion_flags = tracker_data.load(current_user.id)
 
     instructions = [
         {"title": "Life Expectancy", "description": "Use this estimator to determine your expected lifespan. Select your gender, input your age and the sheet will calculate your estimated years remaining and the approximate year you might reach that age using the benchmarks that were published in Prime Time: 27 Lessons for the New Midlife."},
@@ -550,13 +540,7 @@ def tracker():
         "calculators/tracker.html",
         instructions=instructions,
         completion_flags=completion_flags,
-        data={
-            "assets_total": assets_total,
-            "liabilities_total": liabilities_total,
-            "income_total": income_total,
-            "expenses_total": expenses_total,
-            "net_worth": net_worth
-        }
+        data=data
     )
 
 
@@ -591,17 +575,8 @@ def submit_tracker():
 def reset_tracker():
     user_id = current_user.id
 
-    # Delete all data for the current user
-    from .models import (
-        LifeExpectancy, Asset, Liability, Income, Expense, Subscription,
-        FutureBudget, EpicExperience, IncomeLayer, SpendingAllocation
-    )
-
     try:
-        for model in [LifeExpectancy, Asset, Liability, Income, Expense, Subscription,
-                      FutureBudget, EpicExperience, IncomeLayer, SpendingAllocation]:
-            model.query.filter_by(user_id=user_id).delete()
-
+        accounts.reset(user_id)
         db.session.commit()
         return jsonify({"success": True})
     except Exception as e:
@@ -664,6 +639,7 @@ def send_email():
 #------------ Life Expectancy ------------
 
 @views.route('/life')
+@read_only
 @login_required
 def life():
     latest_estimate = LifeExpectancy.query.filter_by(user_id=current_user.id)\
@@ -681,17 +657,12 @@ def life():
 @limiter.limit("5 per minute", key_func=lambda: current_user.id)
 def save_life_expectancy():
     data = request.get_json()
-    estimate = LifeExpectancy(
-        user_id=current_user.id,
-        gender=data["gender"],
-        percentile=data["percentile"],
-        current_age=int(data["current_age"]),
-        expected_lifespan=int(data["expected_lifespan"]),
-        years_remaining=int(data["years_remaining"]),
-        estimated_year_of_death=int(data["estimated_year_of_death"])
-    )
-    db.session.add(estimate)
-    db.session.commit()
+    try:
+        calculator_rows.save_all(current_user.id, {'life_expectancy': data})
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     flash("Life expectancy saved successfully!", "success")
     return jsonify({'redirect': url_for('views.assets')})
 
@@ -700,11 +671,13 @@ def save_life_expectancy():
 #--------- Assets -----------
 
 @views.route('/assets')
+@read_only
 @login_required
 def assets():
     user_assets = Asset.query.filter_by(user_id=current_user.id).all()
     assets_data = [
         {
+            "id": a.id,
             "category": a.category,
             "description": a.description,
             "amount": a.amount,
@@ -713,7 +686,8 @@ def assets():
         }
         for a in user_assets
     ]
-    return render_template('calculators/assets.html', assets_data=assets_data)
+    return render_template('calculators/assets.html', assets_data=assets_data,
+                           data_etag=_data_etag(current_user.id, current_user.data_version))
 
 
 @views.route('/save-assets', methods=['POST'])
@@ -723,18 +697,12 @@ def save_assets():
     data = request.get_json()
     assets = data.get('assets', [])
 
-    Asset.query.filter_by(user_id=current_user.id).delete()
-    for a in assets:
-        asset = Asset(
-            user_id=current_user.id,
-            category=a['category'],
-            description=a['description'],
-            amount=a['amount'],
-            owner=a['owner'],
-            include=a['include']
-        )
-        db.session.add(asset)
-    db.session.commit()
+    try:
+        calculator_rows.sync('assets', current_user.id, assets)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     flash("Assets saved successfully!", "success")
     return jsonify({'redirect': url_for('views.liabilities')})
 
@@ -744,11 +712,13 @@ def save_assets():
 # ------- Liabilities --------
 
 @views.route('/liabilities')
+@read_only
 @login_required
 def liabilities():
     user_liabilities = Liability.query.filter_by(user_id=current_user.id).all()
     liabilities_data = [
         {
+            "id": l.id,
             "category": l.category,
             "name": l.name,
             "amount": l.amount,
@@ -766,19 +736,12 @@ def liabilities():
 def save_liabilities():
     data = request.get_json()
     liabilities = data.get('liabilities', [])
-    Liability.query.filter_by(user_id=current_user.id).delete()
-    for l in liabilities:
-        liability = Liability(
-        user_id=current_user.id,
-        category=l['category'],
-        name=l['name'],
-        amount=l['amount'],
-        type=l['type'],
-        monthly=l['monthly'],
-        notes=l['notes']
-    )
-        db.session.add(liability)
-    db.session.commit()
+    try:
+        calculator_rows.sync('liabilities', current_user.id, liabilities)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     flash("Liabilities saved successfully!", "success")
     return jsonify({'redirect': url_for('views.income')})
 
@@ -787,11 +750,13 @@ def save_liabilities():
 # -------- Income --------
 
 @views.route('/income')
+@read_only
 @login_required
 def income():
     user_incomes = Income.query.filter_by(user_id=current_user.id).all()
     income_data = [
         {
+            "id": inc.id,
             "source": inc.source,
             "amount": inc.amount,
             "frequency": inc.frequency,
@@ -809,17 +774,12 @@ def income():
 def save_income():
     data = request.get_json() or {}
     incomes = data.get('incomes', [])
-    Income.query.filter_by(user_id=current_user.id).delete()
-    for i in incomes:
-        db.session.add(Income(
-            user_id=current_user.id,
-            source=i.get('source', ''),
-            amount=i.get('amount', 0),
-            frequency=i.get('frequency', ''),
-            notes=i.get('notes', ''),
-            include=i.get('include', True)
-        ))
-    db.session.commit()
+    try:
+        calculator_rows.sync('income', current_user.id, incomes)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     print("Received incomes:", incomes)
     flash("Income saved successfully!", "success")
     # Next step in your flow → Expenses
@@ -830,11 +790,13 @@ def save_income():
 # ---- Expenses ----
 
 @views.route('/expenses')
+@read_only
 @login_required
 def expenses():
     user_expenses = Expense.query.filter_by(user_id=current_user.id).all()
     expenses_data = [
         {
+            "id": e.id,
             "category": e.category,
             "item": e.item,
             "amount": e.amount,
@@ -844,7 +806,8 @@ def expenses():
         for e in user_expenses
     ]
     return render_template('calculators/expenses.html',
-                           expenses_data=expenses_data or [])
+                           expenses_data=expenses_data or [],
+                           data_etag=_data_etag(current_user.id, current_user.data_version))
 
 
 @views.route('/save-expenses', methods=['POST'])
@@ -855,23 +818,14 @@ def save_expenses():
         data = request.get_json() or {}
         expenses = data.get('expenses', [])
 
-        Expense.query.filter_by(user_id=current_user.id).delete()
-
-        for e in expenses:
-            expense = Expense(
-                user_id=current_user.id,
-                category=e.get("category", ""),
-                item=e.get("item", ""),
-                amount=float(e.get("amount") or 0),
-                frequency=e.get("frequency", "monthly"),
-                type=e.get("type", "Essential")
-            )
-            db.session.add(expense)
-
+        calculator_rows.sync('expenses', current_user.id, expenses)
         db.session.commit()
         flash("Expenses saved successfully!", "success")
         return jsonify({'redirect': url_for('views.subscriptions')})
 
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         import traceback; traceback.print_exc()
@@ -883,6 +837,7 @@ def save_expenses():
 # ------ Subscriptions ------
 
 @views.route('/subscriptions')
+@read_only
 @login_required
 def subscriptions():
     rows = Subscription.query.filter_by(user_id=current_user.id).all()
@@ -914,6 +869,7 @@ def subscriptions():
 
         subscriptions_data = [
             {
+                "id": r.id,
                 "name": r.name,
                 "provider": r.provider,
                 "amount": r.amount,
@@ -936,31 +892,13 @@ def save_subscriptions():
         data = request.get_json(silent=True) or {}
         subs = data.get('subscriptions', [])
 
-
-        Subscription.query.filter_by(user_id=current_user.id).delete()
-
-        def as_float(v):
-            try:
-                return float(v or 0)
-            except (TypeError, ValueError):
-                return 0.0
-
-        for s in subs:
-            frequency = (s.get('frequency', 'monthly') or 'monthly').lower()
-            db.session.add(Subscription(
-                user_id=current_user.id,
-                name=s.get('name', ''),
-                provider=s.get('provider', ''),
-                amount=as_float(s.get('amount')),
-                frequency=frequency,
-                notes=s.get('notes', ''),
-                include=bool(s.get('include', False)),
-                annual_amount=as_float(s.get('annual_amount')),
-            ))
-
+        calculator_rows.sync('subscriptions', current_user.id, subs)
         db.session.commit()
        
         return jsonify({'redirect': url_for('views.future_budget')})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         import traceback; traceback.print_exc()
@@ -971,11 +909,13 @@ def save_subscriptions():
  # ---- Future Budget ----
 
 @views.route('/future_budget')
+@read_only
 @login_required
 def future_budget():
     rows = FutureBudget.query.filter_by(user_id=current_user.id).all()
     future_budget_data = [
         {
+            "id": r.id,
             "phase": r.phase,
             "age_range": r.age_range,
             "years_in_phase": r.years_in_phase,
@@ -997,35 +937,14 @@ def save_future_budget():
         data = request.get_json(silent=True) or {}
         budgets = data.get('budgets', [])
 
-        FutureBudget.query.filter_by(user_id=current_user.id).delete()
-
-        def as_float(v):
-            try:
-                return float(v or 0)
-            except (TypeError, ValueError):
-                return 0.0
-
-        def as_int(v):
-            try:
-                return int(v or 0)
-            except (TypeError, ValueError):
-                return 0
-
-        for b in budgets:
-            db.session.add(FutureBudget(
-                user_id=current_user.id,
-                phase=b.get('phase', ''),
-                age_range=b.get('age_range', ''),
-                years_in_phase=as_int(b.get('years_in_phase')),
-                baseline_cost=as_float(b.get('baseline_cost')),
-                oneoff_costs=as_float(b.get('oneoff_costs')),
-                epic_experiences=as_float(b.get('epic_experiences')),
-                total_annual_budget=as_float(b.get('total_annual_budget')),
-            ))
+        calculator_rows.sync('future_budget', current_user.id, budgets)
         db.session.commit()
         flash("Future Budget saved successfully!", "success")
 
         return jsonify({'redirect': url_for('views.epic')})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         import traceback; traceback.print_exc()
@@ -1037,11 +956,13 @@ def save_future_budget():
  # ---- Epic Retirement & One-Off Experiences ----
 
 @views.route('/epic')
+@read_only
 @login_required
 def epic():
     rows = EpicExperience.query.filter_by(user_id=current_user.id).all()
     epic_data = [
         {
+            "id": r.id,
             "item": r.item,
             "amount": r.amount,
             "frequency": r.frequency,
@@ -1062,28 +983,16 @@ def save_epic():
     try:
         data = request.get_json()
         epic_items = data.get("items", [])
-        epic_years = data.get("settings", {}).get("years", 10)
-
-        EpicExperience.query.filter_by(user_id=current_user.id).delete()
+        epic_years = calculator_rows.epic_years(data.get("settings", {}).get("years", 10))
 
-        def as_float(v):
-            try:
-                return float(v or 0)
-            except (TypeError, ValueError):
-                return 0.0
-
-        for it in epic_items:
-            db.session.add(EpicExperience(
-                user_id=current_user.id,
-                item=it.get('item', ''),
-                amount=as_float(it.get('amount')),
-                frequency=it.get('frequency') or 'Once only',
-                include=bool(it.get('include', True)),
-            ))
+        calculator_rows.sync('epic', current_user.id, epic_items)
         db.session.commit()
         session["epic_years"] = epic_years
         flash('Epic experiences saved successfully!', 'success')
         return jsonify({'redirect': url_for('views.income_layers')})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         import traceback; traceback.print_exc()
@@ -1096,6 +1005,7 @@ def save_epic():
 #------------ Enough Calculator------------
 
 @views.route('/enough_calculator')
+@read_only
 @login_required
 def enough_calculator():
     rows = EnoughCalculator.query.filter_by(user_id=current_user.id)\
@@ -1111,25 +1021,13 @@ def save_enough_calculator():
     try:
         payload = request.get_json(silent=True) or {}
 
-        EnoughCalculator.query.filter_by(user_id=current_user.id).delete()
-
-        ec = EnoughCalculator(
-            user_id=current_user.id,
-            use_future_budget=payload.get('use_future_budget', 'Yes'),
-            manual_annual=float(payload.get('manual_annual') or 0),
-            real_rate=float(payload.get('real_rate') or 0),
-            years=int(payload.get('years') or 0),
-            pension=float(payload.get('pension') or 0),
-            part_time_income=float(payload.get('part_time_income') or 0),
-            part_time_years=float(payload.get('part_time_years') or 0),
-            shortfall=float(payload.get('shortfall') or 0),
-            lump_sum_rule=float(payload.get('lump_sum_rule') or 0),
-            lump_sum_annuity=float(payload.get('lump_sum_annuity') or 0),
-        )
-        db.session.add(ec)
+        calculator_rows.save_all(current_user.id, {'enough_calculator': payload})
         db.session.commit()
         flash("Enough Calculator data saved successfully!", "success")
         return jsonify({'redirect': url_for('views.summary')})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         import traceback; traceback.print_exc()
@@ -1141,6 +1039,7 @@ def save_enough_calculator():
 # ---- Income Layers ----
 
 @views.route('/income_layers')
+@read_only
 @login_required
 def income_layers():
     rows = IncomeLayer.query.filter_by(user_id=current_user.id).all()
@@ -1163,22 +1062,12 @@ def save_income_layers():
         payload = request.get_json(silent=True) or {}
         items = payload.get('items', [])
 
-
-        IncomeLayer.query.filter_by(user_id=current_user.id).delete()
-
-        for item in items:
-            layer = IncomeLayer(
-                user_id=current_user.id,
-                layer=item.get('layer', ''),
-                description=item.get('description', ''),
-                start_age=item.get('start_age'),
-                end_age=item.get('end_age'),
-                annual_amount=item.get('annual_amount', 0.0)
-            )
-            db.session.add(layer)
-
+        calculator_rows.sync('income_layers', current_user.id, items)
         db.session.commit()
         return jsonify({'redirect': url_for('views.spending_allocation')})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1188,6 +1077,7 @@ def save_income_layers():
 # ---- Spending Allocation ----
 
 @views.route('/spending_allocation')
+@read_only
 @login_required
 def spending_allocation():
     rows = SpendingAllocation.query.filter_by(user_id=current_user.id).all()
@@ -1213,23 +1103,13 @@ def save_spending():
         payload = request.get_json(silent=True) or {}
         allocations = payload.get('allocations', [])
 
-        SpendingAllocation.query.filter_by(user_id=current_user.id).delete()
-
-        for item in allocations:
-            row = SpendingAllocation(
-                user_id=current_user.id,
-                phase=item.get('phase', ''),
-                cost_base=item.get('cost_base', 0.0),
-                cost_life=item.get('cost_life', 0.0),
-                cost_save=item.get('cost_save', 0.0),
-                cost_health=item.get('cost_health', 0.0),
-                cost_other=item.get('cost_other', 0.0),
-            )
-            db.session.add(row)
-
+        calculator_rows.sync('spending', current_user.id, allocations)
         db.session.commit()
         flash("Spending allocation saved successfully!", "success")
         return jsonify({'redirect': url_for('views.summary')})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1254,6 +1134,7 @@ def super():
 # ---- Debt Paydown  ----
 
 @views.route('/debt_paydown')
+@read_only
 @login_required
 def debt_paydown():
     """Render the Debt Paydown Planner (kept under calculators/ to match others)."""
@@ -1269,27 +1150,14 @@ def save_debt_paydown():
         payload = request.get_json(silent=True) or {}
         debts = payload.get('debts', [])
 
-        DebtPaydown.query.filter_by(user_id=current_user.id).delete()
-
-        def f(v):
-            try: return float(v or 0)
-            except (TypeError, ValueError): return 0.0
-
-        for d in debts:
-            db.session.add(DebtPaydown(
-                user_id=current_user.id,
-                name=d.get('name', '') or d.get('debt_name', ''),
-                principal=f(d.get('principal')),
-                annual_interest_rate=f(d.get('annual_interest_rate')),
-                monthly_payment=f(d.get('monthly_payment')),
-                years_to_repay=(f(d.get('years_to_repay')) or None),
-                include=bool(d.get('include', True)),
-            ))
-
+        calculator_rows.sync('debt_paydown', current_user.id, debts)
         db.session.commit()
         flash("Debt paydown data saved successfully!", "success")
         return jsonify({"redirect": url_for('views.enough_calculator')}), 200
 
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         import traceback; traceback.print_exc()
@@ -1297,11 +1165,101 @@ def save_debt_paydown():
     
 
 
+#---------------------------------------------------
+# ---- Batch save ----
+
+@views.route('/save-calculators', methods=['POST'])
+@login_required
+@limiter.limit("5 per minute", key_func=lambda: current_user.id)
+def save_calculators():
+    """Save any subset of the calculators in one transaction.
+
+    The body maps calculator names (see calculator_rows.CALCULATORS and FORMS)
+    to the payload that calculator's own save endpoint takes, e.g.
+    {"assets": [...], "income": [...], "enough_calculator": {...}, "epic_years": 10}.
+    Every calculator is validated first; if any is malformed nothing is written.
+    """
+    document = request.get_json(silent=True)
+    if not isinstance(document, dict) or not document:
+        return jsonify({'error': 'Expected a JSON object keyed by calculator name'}), 400
+    epic_years = document.pop('epic_years', None)
+
+    try:
+        if epic_years is not None:
+            epic_years = calculator_rows.epic_years(epic_years)
+        counts = calculator_rows.save_all(current_user.id, document)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        import traceback; traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+    if epic_years is not None:
+        session["epic_years"] = epic_years
+    return jsonify({'saved': counts})
+
+
+
+#---------------------------------------------------
+# ---- Autosave ----
+
+@views.route('/calculators/<name>/rows', methods=['PATCH'])
+@login_required
+@limiter.limit("60 per minute", key_func=lambda: current_user.id)
+def patch_calculator_rows(name):
+    """Row-level autosave for one calculator table (see calculator_rows.patch).
+
+    Body: {"upsert": [partial rows], "delete": [row ids]}. If-Match must carry
+    the ETag rendered into the page or returned by the previous patch; a stale
+    one is rejected with 412 before anything is read or written.
+    """
+    if name not in calculator_rows.CALCULATORS:
+        return jsonify({'error': f'Unknown calculator: {name}'}), 404
+    user_id = current_user.id
+    prefix = _data_etag(user_id, '')
+    versions = [tag[len(prefix):] for tag in request.if_match.as_set() if tag.startswith(prefix)]
+    if not versions or not versions[0].isdigit():
+        return jsonify({'error': 'If-Match with the calculator ETag is required'}), 428
+
+    version = int(versions[0])
+    if version != current_user.data_version:
+        response = jsonify({'error': 'Your data changed in another window. Reload to keep editing.'})
+        response.set_etag(_data_etag(user_id, current_user.data_version))
+        return response, 412
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        counts, ids, version = calculator_rows.patch(
+            name, user_id, version, payload.get('upsert', []), payload.get('delete', []))
+        db.session.commit()
+    except calculator_rows.StaleVersion:
+        db.session.rollback()
+        response = jsonify({'error': 'Your data changed in another window. Reload to keep editing.'})
+        response.set_etag(_data_etag(user_id, data_version.get(user_id)))
+        return response, 412
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        import traceback; traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+    response = jsonify({'saved': counts, 'ids': ids})
+    response.set_etag(_data_etag(user_id, version))
+    return response
+
+
+
 #------------------------------------------------
 # ------------ Calculator Summary ---------------
 #------------------------------------------------
 
 @views.route('/summary')
+@read_only
 @login_required
 def summary():
     user_id = current_user.id
@@ -1328,181 +1286,19 @@ def summary():
 # ---------- HELPER FUNCTION -----------
 
 def get_calculator_summary(user_id):
-    uid = current_user.id
-
-    # ---------- Assets ----------
-    assets_total = db.session.query(
-        func.coalesce(func.sum(Asset.amount), 0.0)
-    ).filter(Asset.user_id == uid, Asset.include == True).scalar()
-
-    # ---------- Liabilities ----------
-    liabilities_total = db.session.query(
-        func.coalesce(func.sum(Liability.amount), 0.0)
-    ).filter(Liability.user_id == uid).scalar()
-
-
-
-    # ---------- Income: factor(frequency) ----------
-    income_factor = case(
-        (Income.frequency.ilike('weekly'),      52),
-        (Income.frequency.ilike('fortnightly'), 26),
-        (Income.frequency.ilike('monthly'),     12),
-        (Income.frequency.ilike('quarterly'),    4),
-        (Income.frequency.ilike('annually'),     1),
-        else_=12
-    )
-    income_annual = db.session.query(
-        func.coalesce(func.sum(func.coalesce(Income.amount, 0.0) * income_factor), 0.0)
-    ).filter(Income.user_id == uid, Income.include == True).scalar()
-
-
-    income_breakdown_rows = db.session.query(
-        Income.source,
-        func.coalesce(func.sum(func.coalesce(Income.amount, 0.0) * income_factor), 0.0)
-    ).filter(Income.user_id == uid, Income.include == True).group_by(Income.source).all()
-    income_breakdown = [
-        {"label": src or 'Other', "value": float(total or 0.0)}
-        for src, total in income_breakdown_rows
-    ]
-
-    # ---------- Subscriptions ------------
-    sub_factor = case(
-        (Subscription.frequency.ilike('weekly'),      52),
-        (Subscription.frequency.ilike('fortnightly'), 26),
-        (Subscription.frequency.ilike('monthly'),     12),
-        (Subscription.frequency.ilike('quarterly'),    4),
-        (Subscription.frequency.ilike('annually'),     1),
-        else_=12
-    )
-    subs_fallback = func.coalesce(Subscription.amount, 0.0) * sub_factor
-    subs_annual = db.session.query(
-        func.coalesce(func.sum(
-            case(
-                (Subscription.annual_amount.isnot(None), Subscription.annual_amount),
-                else_=subs_fallback
-            )
-        ), 0.0)
-    ).filter(Subscription.user_id == uid, Subscription.include == True).scalar()
-
-
-    subs_rows = db.session.query(
-        Subscription.name,
-        func.coalesce(
-            case(
-                (Subscription.annual_amount.isnot(None), Subscription.annual_amount),
-                else_=Subscription.amount * sub_factor
-            ), 0.0
-        )
-    ).filter(Subscription.user_id == user_id, Subscription.include == True).all()
-
-    subs_breakdown = [
-        {"label": name or "Unnamed", "value": float(amount or 0.0)}
-        for name, amount in subs_rows
-    ]
-
-    
-    # ---------- Expenses ----------
-    expense_factor = case(
-        (Expense.frequency.ilike('weekly'),      52),
-        (Expense.frequency.ilike('fortnightly'), 26),
-        (Expense.frequency.ilike('monthly'),     12),
-        (Expense.frequency.ilike('quarterly'),    4),
-        (Expense.frequency.ilike('annually'),     1),
-        else_=12
-    )
-   
-    expense_buckets_sum = db.session.query(
-        func.coalesce(func.sum(func.coalesce(Expense.amount, 0.0) * expense_factor), 0.0)
-    ).filter(Expense.user_id == uid).scalar()
-
-
-
-    # ---------- Epic Experiences: across 10 years) ----------
-
-    epic_years = 10
-    epic_factor = case(
-        (EpicExperience.frequency.ilike('weekly'),      52),
-        (EpicExperience.frequency.ilike('fortnightly'), 26),
-        (EpicExperience.frequency.ilike('monthly'),     12),
-        (EpicExperience.frequency.ilike('quarterly'),    4),
-        (EpicExperience.frequency.ilike('annually'),     1),
-        (EpicExperience.frequency.ilike('once only'),    0), 
-        else_=0
-    )
-    # regular epics (not one-off)
-    epic_regular = db.session.query(
-        func.coalesce(func.sum(func.coalesce(EpicExperience.amount, 0.0) * epic_factor), 0.0)
-    ).filter(EpicExperience.user_id == uid, EpicExperience.include == True,
-            ~EpicExperience.frequency.ilike('once only')).scalar()
-    
-    # One-offs across epic_years
-    epic_oneoff = db.session.query(
-        func.coalesce(func.sum(func.coalesce(EpicExperience.amount, 0.0)), 0.0)
-    ).filter(EpicExperience.user_id == uid, EpicExperience.include == True,
-            EpicExperience.frequency.ilike('once only')).scalar()
-    epic_annual = (epic_regular or 0.0) + ( (epic_oneoff or 0.0) / float(epic_years or 1) )
-
-
-    # ---------- Future Budget ----------
-    fb_rows = FutureBudget.query.filter_by(user_id=uid).all()
-    fb_baseline  = sum(float(r.baseline_cost or 0.0) for r in fb_rows)
-    fb_oneoff    = sum(float(r.oneoff_costs or 0.0) for r in fb_rows)
-    fb_epic      = sum(float(r.epic_experiences or 0.0) for r in fb_rows)
-    fb_total     = sum(float(r.total_annual_budget or 0.0) for r in fb_rows)
-
-
-    # ---------- Totals----------
-    # subscription counts to Expenses 
-    expenses_annual = (subs_annual or 0.0) + (expense_buckets_sum or 0.0) + (epic_annual or 0.0)
-    net_worth       = (assets_total or 0.0) - (liabilities_total or 0.0)
-    surplus_annual  = (income_annual or 0.0) - expenses_annual
-    surplus_monthly = surplus_annual / 12.0
-
-    actual_breakdown = [
-        {"label": "Bills/Subscriptions", "value": float(subs_annual or 0.0)},
-        {"label": "Expenses",             "value": float(expense_buckets_sum or 0.0)},
-        {"label": "Epic Experiences",     "value": float(epic_annual or 0.0)},
-    ]
-
-    budget_targets = {
-        "baseline": float(fb_baseline),
-        "oneoff":   float(fb_oneoff),
-        "epic":     float(fb_epic),
-        "total":    float(fb_total),
-    }
-
-    print("Assets Total:", assets_total)
-    print("Income Annual:", income_annual)
-    print("Expenses Annual:", expenses_annual)
-    print("Subscriptions Annual:", subs_annual)
-    print("Epic Annual:", epic_annual)
-    print("Future Budget Total:", fb_total)
-
-
-    summary_payload = {
-        "net_worth": float(net_worth or 0.0),
-        "assets":{"total": float(assets_total or 0.0)},
-        "liabilities":{"total": float(liabilities_total or 0.0)},
-        "income":{"total": float(income_annual or 0.0)},
-        "subscriptions":{"total": float(subs_annual or 0.0)},
-        "expenses":{"total": float(expenses_annual or 0.0)}
-    }
-
-    session['summary_data'] = summary_payload
-    return {
-        "assets_total": assets_total,
-        "liabilities_total": liabilities_total,
-        "income_annual": income_annual,
-        "income_breakdown": income_breakdown,
-        "subs_annual": subs_annual,
-        "subs_breakdown": subs_breakdown,
-        "expense_buckets_sum": expense_buckets_sum,
-        "epic_annual": epic_annual,
-        "expenses_annual": expenses_annual,
-        "net_worth": net_worth,
-        "surplus_annual": surplus_annual,
-        "surplus_monthly": surplus_monthly,
-        "actual_breakdown": actual_breakdown,
-        "budget_targets": budget_targets
-
+    # current_user was loaded with its data_version, so a cache hit runs no SQL.
+    if getattr(current_user, 'id', None) == user_id:
+        version = current_user.data_version
+    else:
+        version = data_version.get(user_id)
+    summary = calculator_summary.cached(user_id, version)
+
+    session['summary_data'] = {
+        "net_worth": summary["net_worth"],
+        "assets":{"total": summary["assets_total"]},
+        "liabilities":{"total": summary["liabilities_total"]},
+        "income":{"total": summary["income_annual"]},
+        "subscriptions":{"total": summary["subs_annual"]},
+        "expenses":{"total": summary["expenses_annual"]}
     }
+    return summary